@@ -1,8 +1,18 @@
+import asyncio
+import functools
 from abc import ABC, abstractmethod
 from typing import Any, Dict
 from ..models import ProjectState, AgentStatus
+from ..deadline import has_time_for, DeadlineExceeded
+from ..tracing import span, instant
 
 class BaseAgent(ABC):
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Every agent's process() shows up as a span on the project trace
+        if "process" in cls.__dict__:
+            cls.process = _traced_process(cls.__dict__["process"])
+
     def __init__(self, name: str):
         self.name = name
         self.status = AgentStatus(agent_name=name, status="idle")
@@ -13,9 +23,44 @@ class BaseAgent(ABC):
             self.status.current_task = task
         self.status.last_updated = self.status.last_updated.now()
 
+    def can_use_llm(self, project_state: ProjectState) -> bool:
+        """
+        False in fast mode, or when the project deadline is too close for an
+        LLM round trip; the latter is recorded as degraded. Either way the
+        stage uses its heuristics.
+        """
+        if project_state.mode == "fast":
+            return False
+        if has_time_for():
+            return True
+        self.mark_degraded(project_state, "deadline")
+        return False
+
+    async def simulate_work(self, project_state: ProjectState, seconds: float):
+        """Pause so the heuristic stages are visible in the UI; skipped in fast mode."""
+        if project_state.mode != "fast":
+            await asyncio.sleep(seconds)
+
+    def mark_degraded(self, project_state: ProjectState, reason):
+        """Record why this stage fell back; `reason` may be the LLM exception."""
+        if isinstance(reason, DeadlineExceeded):
+            reason = "deadline"
+        elif isinstance(reason, Exception):
+            reason = f"LLM failed: {reason}"
+        project_state.degraded_stages.setdefault(self.name, reason)
+        instant(f"{self.name} fallback", "fallback", reason=reason)
+
     @abstractmethod
     async def process(self, project_state: ProjectState) -> ProjectState:
         """
         Process the project state and return the updated state.
         """
         pass
+
+
+def _traced_process(process):
+    @functools.wraps(process)
+    async def traced(self, project_state: ProjectState) -> ProjectState:
+        with span(self.name, "agent"):
+            return await process(self, project_state)
+    return traced
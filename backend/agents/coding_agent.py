@@ -1,11 +1,31 @@
 from .base import BaseAgent
-from ..models import ProjectState, Artifacts
+from ..models import ProjectState, Artifacts, FileRef, FileListDraft, CodeDraft
 from ..llm import generate_json, generate_completion, GROQ_API_KEY
+from ..deadline import DeadlineExceeded
+from ..storage import store_files, blob_store
+from ..project_store import project_store
+from typing import Dict, Tuple
 import asyncio
 
+# Files that get full code during the pipeline run; the rest of the
+# structure is generated on first request (see generate_file)
+MAX_CODE_FILES = 4
+
+def tech_stack(brief: str) -> str:
+    brief_lower = brief.lower()
+    if "node" in brief_lower or "express" in brief_lower:
+        return "Node.js/Express"
+    elif "django" in brief_lower:
+        return "Python/Django"
+    elif "flask" in brief_lower:
+        return "Python/Flask"
+    return "Python/FastAPI"
+
 class CodingAgent(BaseAgent):
     def __init__(self):
         super().__init__(name="Coding Agent")
+        # (project id, path) -> generation in flight, shared by concurrent requests
+        self._pending: Dict[Tuple[str, str], asyncio.Task] = {}
 
     async def process(self, project_state: ProjectState) -> ProjectState:
         if not project_state.srs:
@@ -14,21 +34,10 @@ class CodingAgent(BaseAgent):
             
         self.update_status("working", "Generating Project Code...")
         
-        brief_lower = project_state.brief.brief_content.lower()
-        
-        # Detect tech stack
-        if "node" in brief_lower or "express" in brief_lower:
-            tech = "Node.js/Express"
-        elif "django" in brief_lower:
-            tech = "Python/Django"
-        elif "flask" in brief_lower:
-            tech = "Python/Flask"
-        else:
-            tech = "Python/FastAPI"
-        
-        req_descriptions = "\n".join([f"- {r.description} (Priority: {r.priority})" for r in project_state.srs.requirements])
+        tech = tech_stack(project_state.brief.brief_content)
+        req_descriptions = self._requirements_text(project_state)
         
-        if GROQ_API_KEY:
+        if GROQ_API_KEY and self.can_use_llm(project_state):
             try:
                 # Step 1: Generate file structure
                 self.update_status("working", f"Designing {tech} Architecture...")
@@ -41,37 +50,33 @@ Requirements:
 Return JSON with key "files" containing a list of file paths (max 12 important files).
 Example: {{"files": ["backend/main.py", "backend/models.py", "frontend/src/App.tsx", "docker-compose.yml"]}}"""
 
-                struct_res = await generate_json(struct_prompt, "Generate the file structure.")
-                files = struct_res.get("files", [])
-                
-                # Step 2: Generate actual code for top 3 files
+                # Start writing the first files while the rest of the structure streams in
                 self.update_status("working", "Writing Code Files...")
-                code_snippets = {}
-                
-                # Generate code for multiple key files
-                important_files = files[:4] if len(files) >= 4 else files
-                
-                for filename in important_files:
-                    try:
-                        self.update_status("working", f"Writing {filename}...")
-                        code_prompt = f"""Write production-quality code for the file: {filename}
+                writers = {}
 
-Project: {project_state.brief.brief_content}
-Tech Stack: {tech}
-Requirements:
-{req_descriptions}
+                def start_writer(filename):
+                    if isinstance(filename, str) and filename not in writers and len(writers) < MAX_CODE_FILES:
+                        writers[filename] = asyncio.create_task(
+                            self._write_file(filename, project_state, tech, req_descriptions)
+                        )
 
-Write complete, working code with proper imports, error handling, and comments.
-Return JSON: {{"code": "...the full file content..."}}"""
+                try:
+                    struct_res = await generate_json(struct_prompt, "Generate the file structure.", stream_key="files", on_item=start_writer, route="coding.structure", schema=FileListDraft)
+                    files = struct_res.get("files", [])
+
+                    # Generate code for multiple key files
+                    for filename in files[:MAX_CODE_FILES]:
+                        start_writer(filename)
+                    results = await asyncio.gather(*writers.values())
+                except BaseException:
+                    for task in writers.values():
+                        task.cancel()
+                    raise
+                code_snippets = dict(zip(writers.keys(), results))
 
-                        code_res = await generate_json(code_prompt, f"Write code for {filename}")
-                        code_snippets[filename] = code_res.get("code", f"# TODO: Implement {filename}")
-                    except Exception as e:
-                        code_snippets[filename] = f"# Error generating code: {e}"
-                
                 project_state.artifacts = Artifacts(
                     file_structure=files,
-                    code_snippets=code_snippets
+                    files=store_files(code_snippets)
                 )
                 
                 self.update_status("completed", f"Generated {len(code_snippets)} code files.")
@@ -79,16 +84,17 @@ Return JSON: {{"code": "...the full file content..."}}"""
                 
             except Exception as e:
                 print(f"Coding Agent LLM Error: {e}")
+                self.mark_degraded(project_state, e)
         
         # Fallback: Generate basic templates
-        await asyncio.sleep(1)
+        await self.simulate_work(project_state, 1)
         project_state.artifacts = Artifacts(
             file_structure=[
                 "backend/main.py", "backend/models.py", "backend/routes.py",
                 "frontend/src/App.tsx", "frontend/src/index.css",
                 "docker-compose.yml", "README.md", ".env.example"
             ],
-            code_snippets={
+            files=store_files({
                 "backend/main.py": f'''from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -112,7 +118,79 @@ pip install -r requirements.txt
 uvicorn backend.main:app --reload
 ```
 '''
-            }
+            })
         )
         self.update_status("completed", "Generated template code (Heuristic).")
         return project_state
+
+    @staticmethod
+    def _requirements_text(project_state: ProjectState) -> str:
+        return "\n".join([f"- {r.description} (Priority: {r.priority})" for r in project_state.srs.requirements])
+
+    async def _generate_code(self, filename: str, project_state: ProjectState, tech: str, req_descriptions: str) -> str:
+        # Project context first and the file name last, so every file of a
+        # project shares the same prompt prefix
+        code_prompt = f"""Write production-quality code for one file of this project.
+
+Project: {project_state.brief.brief_content}
+Tech Stack: {tech}
+Requirements:
+{req_descriptions}
+
+Write complete, working code with proper imports, error handling, and comments.
+Return JSON: {{"code": "...the full file content..."}}"""
+
+        code_res = await generate_json(code_prompt, f"Write code for {filename}", route="coding.file", schema=CodeDraft)
+        return code_res.get("code", f"# TODO: Implement {filename}")
+
+    async def _write_file(self, filename: str, project_state: ProjectState, tech: str, req_descriptions: str) -> str:
+        try:
+            self.update_status("working", f"Writing {filename}...")
+            return await self._generate_code(filename, project_state, tech, req_descriptions)
+        except DeadlineExceeded:
+            self.mark_degraded(project_state, "deadline")
+            return f"# TODO: Implement {filename}"
+        except Exception as e:
+            return f"# Error generating code: {e}"
+
+    def can_generate(self, project_state: ProjectState) -> bool:
+        """Whether a skipped file can be written by the LLM now (never in fast mode)."""
+        return bool(GROQ_API_KEY and project_state.srs and project_state.mode == "full")
+
+    async def generate_file(self, project_state: ProjectState, filename: str) -> FileRef:
+        """
+        Generate one file of the project's structure that the pipeline
+        skipped, store it and record it on the project, which is
+        checkpointed so the file survives a restart. Concurrent requests
+        for the same file share one LLM call. Errors propagate and nothing
+        is stored, so a later request retries.
+        """
+        key = (project_state.id, filename)
+        task = self._pending.get(key)
+        if task is None:
+            task = self._pending[key] = asyncio.create_task(self._generate_and_store(project_state, filename))
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        # Shielded: one caller disconnecting doesn't cancel it for the others
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if task.cancelled():  # the project was cancelled, not this request
+                raise RuntimeError("generation cancelled")
+            raise
+
+    def cancel_pending(self, project_id: str):
+        """Cancel on-demand generations for a project."""
+        for (pid, _), task in list(self._pending.items()):
+            if pid == project_id:
+                task.cancel()
+
+    async def _generate_and_store(self, project_state: ProjectState, filename: str) -> FileRef:
+        tech = tech_stack(project_state.brief.brief_content)
+        code = await self._generate_code(filename, project_state, tech, self._requirements_text(project_state))
+        ref = blob_store.put(code)
+        project_state.artifacts.files[filename] = ref
+        project_state.touch()
+        # Persist the new ref now (even if the requester went away), or a
+        # restart before the project is spilled pays for the LLM call again
+        project_store.checkpoint(project_state.id)
+        return ref
@@ -1,5 +1,7 @@
 from .base import BaseAgent
-from ..models import ProjectState, ProjectPlan, WBSTask
+from ..models import ProjectState, ProjectPlan, WBSTask, PlanDraft
+from ..simulation import simulate_plan
+from ..brief_index import brief_index
 import uuid
 import asyncio
 
@@ -19,7 +21,7 @@ class PlanningAgent(BaseAgent):
         complexity_score = 3  # Default: simple project
         
 
-        if GROQ_API_KEY:
+        if GROQ_API_KEY and self.can_use_llm(project_state):
             try:
                 self.update_status("working", "Consulting AI for Estimation...")
                 req_text = "\n".join([f"- {r.description} ({r.priority})" for r in project_state.srs.requirements])
@@ -32,31 +34,43 @@ RULES:
 - Testing = 1-2 days total, NOT per feature
 - Do NOT pad estimates. Be aggressive and lean.
 - Max 8 tasks total
+- days_optimistic / days_pessimistic are the best and worst case for each task
 
 Return JSON:
 {
     "complexity_score": 1-10,
     "tasks": [
-        {"name": string, "description": string, "role_category": "backend"|"frontend"|"setup"|"test"|"devops", "days": number, "dependency": string|null}
+        {"name": string, "description": string, "role_category": "backend"|"frontend"|"setup"|"test"|"devops", "days": number, "days_optimistic": number, "days_pessimistic": number, "dependency": string|null}
     ]
-}"""
-                response = await generate_json(system_prompt, f"Requirements:\n{req_text}")
+}""" + brief_index.example_for(project_state, "plan")
+                streamed = []
+
+                def on_task(t):
+                    streamed.append(t)
+                    self.update_status("working", f"Estimated {len(streamed)} tasks...")
+
+                response = await generate_json(system_prompt, f"Requirements:\n{req_text}", stream_key="tasks", on_item=on_task, route="planning", schema=PlanDraft)
                 
                 complexity_score = response.get("complexity_score", 3)
                 
                 for i, t in enumerate(response.get("tasks", [])):
                     days = min(t.get('days', 1), 5)  # Cap single task at 5 days
+                    optimistic = t.get('days_optimistic')
+                    pessimistic = t.get('days_pessimistic')
                     tasks.append(WBSTask(
                         id=f"TASK-{i+1:03d}",
                         name=t['name'],
                         description=t.get('description', ''),
                         estimated_days=round(days, 1),
+                        optimistic_days=round(min(optimistic, days), 1) if optimistic is not None else None,
+                        pessimistic_days=round(max(pessimistic, days), 1) if pessimistic is not None else None,
                         dependencies=[t['dependency']] if t.get('dependency') else [],
                         assigned_role=t.get('role_category', 'backend')
                     ))
                     
             except Exception as e:
                 print(f"LLM Planning Failed: {e}")
+                self.mark_degraded(project_state, e)
         
         if not tasks:
             # Fallback Heuristic
@@ -121,7 +135,8 @@ Return JSON:
             elif "design" in name_lower: role = "design"
             
             multiplier = ROLE_MULTIPLIER.get(role, 1.0)
-            cost = task.estimated_days * BASE_RATE * multiplier
+            task.daily_rate = BASE_RATE * multiplier
+            cost = task.estimated_days * task.daily_rate
             total_cost += cost
             total_days += task.estimated_days
         
@@ -132,6 +147,10 @@ Return JSON:
             total_cost = round(total_cost * scale, 2)
             for task in tasks:
                 task.estimated_days = round(task.estimated_days * scale, 1)
+                if task.optimistic_days is not None:
+                    task.optimistic_days = round(task.optimistic_days * scale, 1)
+                if task.pessimistic_days is not None:
+                    task.pessimistic_days = round(task.pessimistic_days * scale, 1)
             
         project_state.plan = ProjectPlan(
             project_id=project_state.id,
@@ -139,6 +158,9 @@ Return JSON:
             total_estimated_days=round(total_days, 1),
             estimated_cost=round(total_cost, 2)
         )
+
+        # P50/P80/P95 schedule & cost spread around the point estimate
+        project_state.plan.risk = simulate_plan(project_state.plan)
         
         self.update_status("completed", f"Plan Created. Cost: ${total_cost:,.2f}")
         return project_state
@@ -1,10 +1,17 @@
 from .base import BaseAgent
-from ..models import ProjectState
-from ..llm import generate_completion, GROQ_API_KEY
-import re
+from ..models import ProjectState, PrototypeCopy
+from ..llm import generate_json, GROQ_API_KEY
+from collections import OrderedDict
+from typing import AsyncIterator, List, Tuple
+import asyncio
+import hashlib
 import html as html_module
 
 
+# LLM copies kept for repeat views of the same project
+PROTOTYPE_COPY_CACHE_ENTRIES = 256
+
+
 class PrototypeAgent(BaseAgent):
     """
     Generates a self-contained HTML+CSS prototype website.
@@ -12,23 +19,74 @@ class PrototypeAgent(BaseAgent):
     """
     def __init__(self):
         super().__init__(name="Prototype Agent")
+        # (project id, digest of the prompt inputs) -> LLM copy, in flight or done
+        self._copies: "OrderedDict[Tuple[str, str], asyncio.Task]" = OrderedDict()
     
     async def process(self, project_state: ProjectState) -> dict:
-        self.update_status("working", "Generating website prototype...")
+        features = await self._copy(project_state)
+        page_html = self._build_page(project_state.brief.name or "AppName", features)
+        self.update_status("completed", "Prototype generated!")
         
-        brief = project_state.brief.brief_content
+        return {"html": page_html}
+
+    async def stream(self, project_state: ProjectState) -> AsyncIterator[str]:
+        """
+        The same page in chunks: the head, CSS and nav shell right away,
+        then the sections once their copy is ready.
+        """
         project_name = project_state.brief.name or "AppName"
-        
+        yield self._page_head(project_name)
+        features = await self._copy(project_state)
+        for section in self._page_sections(project_name, features):
+            yield section
+        self.update_status("completed", "Prototype generated!")
+
+    @staticmethod
+    def _copy_inputs(project_state: ProjectState) -> Tuple[str, str]:
         req_text = ""
         if project_state.srs:
             req_text = "\n".join([f"- {r.description}" for r in project_state.srs.requirements[:6]])
+        return project_state.brief.brief_content, req_text
+
+    def _copy_key(self, project_state: ProjectState) -> Tuple[str, str]:
+        brief, req_text = self._copy_inputs(project_state)
+        return project_state.id, hashlib.sha256(f"{brief}\0{req_text}".encode()).hexdigest()
+
+    def needs_llm(self, project_state: ProjectState) -> bool:
+        """Whether rendering the page now would make an LLM call (no cached copy)."""
+        if not GROQ_API_KEY or project_state.mode == "fast":
+            return False
+        task = self._copies.get(self._copy_key(project_state))
+        return task is None or (task.done() and (task.cancelled() or task.exception() is not None))
+
+    async def _llm_copy(self, project_state: ProjectState) -> dict:
+        """
+        LLM copy, generated once per project and prompt inputs; repeat views
+        and concurrent ones share it. Failures aren't kept, so a later view
+        retries.
+        """
+        key = self._copy_key(project_state)
+        task = self._copies.get(key)
+        if task is None or (task.done() and (task.cancelled() or task.exception() is not None)):
+            task = self._copies[key] = asyncio.create_task(self._get_features_from_llm(*self._copy_inputs(project_state)))
+            if len(self._copies) > PROTOTYPE_COPY_CACHE_ENTRIES:
+                self._copies.popitem(last=False)
+        self._copies.move_to_end(key)
+        # Shielded: one viewer disconnecting doesn't cancel it for the others
+        return await asyncio.shield(task)
+
+    async def _copy(self, project_state: ProjectState) -> dict:
+        """Marketing copy for the page: from the LLM, or generic copy without it."""
+        self.update_status("working", "Generating website prototype...")
+        
+        brief, _ = self._copy_inputs(project_state)
         
         # Try LLM to generate custom feature descriptions
         features = None
-        if GROQ_API_KEY:
+        if GROQ_API_KEY and self.can_use_llm(project_state):
             try:
                 self.update_status("working", "AI designing your website...")
-                features = await self._get_features_from_llm(brief, req_text)
+                features = await self._llm_copy(project_state)
             except Exception as e:
                 print(f"Prototype LLM error: {e}")
         
@@ -47,11 +105,7 @@ class PrototypeAgent(BaseAgent):
                     {"title": "Go Live", "desc": "Deploy and see results immediately."},
                 ]
             }
-        
-        page_html = self._build_page(project_name, features)
-        self.update_status("completed", "Prototype generated!")
-        
-        return {"html": page_html}
+        return features
     
     async def _get_features_from_llm(self, brief: str, req_text: str) -> dict:
         prompt = f"""For this project, generate marketing website content in EXACTLY this JSON format. Return ONLY valid JSON, nothing else.
@@ -77,33 +131,23 @@ Return this exact JSON structure:
 
 ONLY return JSON. No markdown, no backticks, no explanation."""
 
-        raw = await generate_completion(
+        # Repaired and validated (3+ features and steps), missing fields filled by a follow-up
+        return await generate_json(
             "You are a JSON generator. Return ONLY valid JSON. No markdown, no backticks.",
-            prompt
+            prompt,
+            route="prototype.copy",
+            schema=PrototypeCopy,
         )
-        
-        raw = raw.strip()
-        # Remove markdown fences
-        if raw.startswith("```"):
-            lines = raw.split("\n")
-            lines = [l for l in lines if not l.strip().startswith("```")]
-            raw = "\n".join(lines).strip()
-        
-        import json
-        data = json.loads(raw)
-        
-        # Validate structure
-        if "tagline" in data and "features" in data and "steps" in data:
-            if len(data["features"]) >= 3 and len(data["steps"]) >= 3:
-                return data
-        
-        return None
 
     def _esc(self, text: str) -> str:
         """Escape text for safe HTML embedding."""
         return html_module.escape(str(text))
 
     def _build_page(self, project_name: str, features: dict) -> str:
+        return self._page_head(project_name) + "".join(self._page_sections(project_name, features))
+
+    def _page_sections(self, project_name: str, features: dict) -> List[str]:
+        """Everything after the nav: hero and stats, features, steps, then the static rest."""
         safe_name = self._esc(project_name)
         tagline = self._esc(features.get("tagline", "Build Something Extraordinary"))
         subtitle = self._esc(features.get("subtitle", "Next-generation platform"))
@@ -139,6 +183,151 @@ ONLY return JSON. No markdown, no backticks, no explanation."""
                 <p class="step-desc">{self._esc(s.get("desc", "Description"))}</p>
             </div>'''
 
+        return [
+            f'''
+<section class="hero">
+    <div class="hero-badge">
+        <span class="hero-dot"></span>
+        AI-Powered Platform
+    </div>
+    <h1>
+        {tagline.split()[0] if " " in tagline else tagline}<br/>
+        <span class="hero-gradient">{" ".join(tagline.split()[1:]) if " " in tagline else "Extraordinary"}</span>
+    </h1>
+    <p>{subtitle}</p>
+    <div class="hero-buttons">
+        <button class="btn-primary">Start Free Trial →</button>
+        <button class="btn-secondary">Watch Demo ▶</button>
+    </div>
+</section>
+
+<section class="stats">
+    <div class="stat" style="--stat-c1: #60a5fa; --stat-c2: #22d3ee;">
+        <div class="stat-value">10K+</div>
+        <div class="stat-label">Active Users</div>
+    </div>
+    <div class="stat" style="--stat-c1: #a78bfa; --stat-c2: #f472b6;">
+        <div class="stat-value">99.9%</div>
+        <div class="stat-label">Uptime SLA</div>
+    </div>
+    <div class="stat" style="--stat-c1: #34d399; --stat-c2: #4ade80;">
+        <div class="stat-value">50+</div>
+        <div class="stat-label">Integrations</div>
+    </div>
+    <div class="stat" style="--stat-c1: #fbbf24; --stat-c2: #f97316;">
+        <div class="stat-value">4.9★</div>
+        <div class="stat-label">User Rating</div>
+    </div>
+</section>
+
+''',
+            f'''<section class="section" id="features">
+    <div class="section-label" style="color: #60a5fa;">Features</div>
+    <h2 class="section-title">Everything You Need</h2>
+    <p class="section-desc">Powerful tools designed to help you build, deploy, and scale with confidence.</p>
+    <div class="features-grid">
+        {features_html}
+    </div>
+</section>
+
+''',
+            f'''<section class="section" id="how">
+    <div class="section-label" style="color: #a78bfa;">Process</div>
+    <h2 class="section-title">Simple 3-Step Process</h2>
+    <div class="steps-grid" style="margin-top: 48px;">
+        {steps_html}
+    </div>
+</section>
+
+''',
+            f'''<section class="section" id="pricing">
+    <div class="section-label" style="color: #22d3ee;">Pricing</div>
+    <h2 class="section-title">Plans for Every Scale</h2>
+    <p class="section-desc">Start free, scale when you are ready. No hidden fees.</p>
+    <div class="pricing-grid">
+        <div class="price-card">
+            <div class="price-name">Starter</div>
+            <div class="price-amount">Free</div>
+            <p class="price-desc">Perfect for trying out</p>
+            <button class="price-btn price-btn-outline">Get Started</button>
+            <ul class="price-list">
+                <li><span class="check">✓</span> 5 Projects</li>
+                <li><span class="check">✓</span> Basic Analytics</li>
+                <li><span class="check">✓</span> Community Support</li>
+            </ul>
+        </div>
+        <div class="price-card featured">
+            <div class="price-badge">MOST POPULAR</div>
+            <div class="price-name">Pro</div>
+            <div class="price-amount">$29<span class="price-period">/mo</span></div>
+            <p class="price-desc">Best for growing teams</p>
+            <button class="price-btn price-btn-gradient">Start Trial</button>
+            <ul class="price-list">
+                <li><span class="check">✓</span> Unlimited Projects</li>
+                <li><span class="check">✓</span> Advanced Analytics</li>
+                <li><span class="check">✓</span> Priority Support</li>
+                <li><span class="check">✓</span> API Access</li>
+            </ul>
+        </div>
+        <div class="price-card">
+            <div class="price-name">Enterprise</div>
+            <div class="price-amount">Custom</div>
+            <p class="price-desc">For large organizations</p>
+            <button class="price-btn price-btn-outline">Contact Sales</button>
+            <ul class="price-list">
+                <li><span class="check">✓</span> Everything in Pro</li>
+                <li><span class="check">✓</span> Custom Integrations</li>
+                <li><span class="check">✓</span> Dedicated Support</li>
+                <li><span class="check">✓</span> SLA Guarantee</li>
+            </ul>
+        </div>
+    </div>
+</section>
+
+<section class="section">
+    <div class="cta-box">
+        <h2>Ready to Get Started?</h2>
+        <p>Join thousands building the future. Start your free trial today, no credit card required.</p>
+        <button class="btn-primary">Start Building Now →</button>
+    </div>
+</section>
+
+<footer>
+    <div class="footer-inner">
+        <div class="footer-grid">
+            <div>
+                <a href="#" class="nav-brand">
+                    <div class="nav-logo" style="width:32px;height:32px;font-size:14px;border-radius:8px;">⚡</div>
+                    <span style="font-weight:700;">{safe_name}</span>
+                </a>
+                <p class="footer-brand-desc">Empowering teams to build and ship faster than ever.</p>
+            </div>
+            <div class="footer-col">
+                <h4>Product</h4>
+                <ul><li>Features</li><li>Pricing</li><li>API Docs</li></ul>
+            </div>
+            <div class="footer-col">
+                <h4>Company</h4>
+                <ul><li>About</li><li>Blog</li><li>Careers</li></ul>
+            </div>
+            <div class="footer-col">
+                <h4>Legal</h4>
+                <ul><li>Privacy</li><li>Terms</li><li>Security</li></ul>
+            </div>
+        </div>
+        <div class="footer-bottom">
+            Designed with AutoSDLC — AI-Powered Software Engineering Platform
+        </div>
+    </div>
+</footer>
+
+</body>
+</html>''',
+        ]
+
+    def _page_head(self, project_name: str) -> str:
+        """Document head with all the CSS, plus the background and nav shell."""
+        safe_name = self._esc(project_name)
         return f'''<!DOCTYPE html>
 <html lang="en">
 <head>
@@ -488,139 +677,4 @@ footer {{
         <button class="nav-cta">Get Started</button>
     </div>
 </nav>
-
-<section class="hero">
-    <div class="hero-badge">
-        <span class="hero-dot"></span>
-        AI-Powered Platform
-    </div>
-    <h1>
-        {tagline.split()[0] if " " in tagline else tagline}<br/>
-        <span class="hero-gradient">{" ".join(tagline.split()[1:]) if " " in tagline else "Extraordinary"}</span>
-    </h1>
-    <p>{subtitle}</p>
-    <div class="hero-buttons">
-        <button class="btn-primary">Start Free Trial →</button>
-        <button class="btn-secondary">Watch Demo ▶</button>
-    </div>
-</section>
-
-<section class="stats">
-    <div class="stat" style="--stat-c1: #60a5fa; --stat-c2: #22d3ee;">
-        <div class="stat-value">10K+</div>
-        <div class="stat-label">Active Users</div>
-    </div>
-    <div class="stat" style="--stat-c1: #a78bfa; --stat-c2: #f472b6;">
-        <div class="stat-value">99.9%</div>
-        <div class="stat-label">Uptime SLA</div>
-    </div>
-    <div class="stat" style="--stat-c1: #34d399; --stat-c2: #4ade80;">
-        <div class="stat-value">50+</div>
-        <div class="stat-label">Integrations</div>
-    </div>
-    <div class="stat" style="--stat-c1: #fbbf24; --stat-c2: #f97316;">
-        <div class="stat-value">4.9★</div>
-        <div class="stat-label">User Rating</div>
-    </div>
-</section>
-
-<section class="section" id="features">
-    <div class="section-label" style="color: #60a5fa;">Features</div>
-    <h2 class="section-title">Everything You Need</h2>
-    <p class="section-desc">Powerful tools designed to help you build, deploy, and scale with confidence.</p>
-    <div class="features-grid">
-        {features_html}
-    </div>
-</section>
-
-<section class="section" id="how">
-    <div class="section-label" style="color: #a78bfa;">Process</div>
-    <h2 class="section-title">Simple 3-Step Process</h2>
-    <div class="steps-grid" style="margin-top: 48px;">
-        {steps_html}
-    </div>
-</section>
-
-<section class="section" id="pricing">
-    <div class="section-label" style="color: #22d3ee;">Pricing</div>
-    <h2 class="section-title">Plans for Every Scale</h2>
-    <p class="section-desc">Start free, scale when you are ready. No hidden fees.</p>
-    <div class="pricing-grid">
-        <div class="price-card">
-            <div class="price-name">Starter</div>
-            <div class="price-amount">Free</div>
-            <p class="price-desc">Perfect for trying out</p>
-            <button class="price-btn price-btn-outline">Get Started</button>
-            <ul class="price-list">
-                <li><span class="check">✓</span> 5 Projects</li>
-                <li><span class="check">✓</span> Basic Analytics</li>
-                <li><span class="check">✓</span> Community Support</li>
-            </ul>
-        </div>
-        <div class="price-card featured">
-            <div class="price-badge">MOST POPULAR</div>
-            <div class="price-name">Pro</div>
-            <div class="price-amount">$29<span class="price-period">/mo</span></div>
-            <p class="price-desc">Best for growing teams</p>
-            <button class="price-btn price-btn-gradient">Start Trial</button>
-            <ul class="price-list">
-                <li><span class="check">✓</span> Unlimited Projects</li>
-                <li><span class="check">✓</span> Advanced Analytics</li>
-                <li><span class="check">✓</span> Priority Support</li>
-                <li><span class="check">✓</span> API Access</li>
-            </ul>
-        </div>
-        <div class="price-card">
-            <div class="price-name">Enterprise</div>
-            <div class="price-amount">Custom</div>
-            <p class="price-desc">For large organizations</p>
-            <button class="price-btn price-btn-outline">Contact Sales</button>
-            <ul class="price-list">
-                <li><span class="check">✓</span> Everything in Pro</li>
-                <li><span class="check">✓</span> Custom Integrations</li>
-                <li><span class="check">✓</span> Dedicated Support</li>
-                <li><span class="check">✓</span> SLA Guarantee</li>
-            </ul>
-        </div>
-    </div>
-</section>
-
-<section class="section">
-    <div class="cta-box">
-        <h2>Ready to Get Started?</h2>
-        <p>Join thousands building the future. Start your free trial today, no credit card required.</p>
-        <button class="btn-primary">Start Building Now →</button>
-    </div>
-</section>
-
-<footer>
-    <div class="footer-inner">
-        <div class="footer-grid">
-            <div>
-                <a href="#" class="nav-brand">
-                    <div class="nav-logo" style="width:32px;height:32px;font-size:14px;border-radius:8px;">⚡</div>
-                    <span style="font-weight:700;">{safe_name}</span>
-                </a>
-                <p class="footer-brand-desc">Empowering teams to build and ship faster than ever.</p>
-            </div>
-            <div class="footer-col">
-                <h4>Product</h4>
-                <ul><li>Features</li><li>Pricing</li><li>API Docs</li></ul>
-            </div>
-            <div class="footer-col">
-                <h4>Company</h4>
-                <ul><li>About</li><li>Blog</li><li>Careers</li></ul>
-            </div>
-            <div class="footer-col">
-                <h4>Legal</h4>
-                <ul><li>Privacy</li><li>Terms</li><li>Security</li></ul>
-            </div>
-        </div>
-        <div class="footer-bottom">
-            Designed with AutoSDLC — AI-Powered Software Engineering Platform
-        </div>
-    </div>
-</footer>
-
-</body>
-</html>'''
+'''
@@ -1,7 +1,7 @@
 from .base import BaseAgent
-from ..models import ProjectState, SRS, Requirement
+from ..models import ProjectState, SRS, Requirement, RequirementsDraft
+from ..brief_index import brief_index
 import uuid
-import asyncio
 
 class RequirementAgent(BaseAgent):
     def __init__(self):
@@ -14,7 +14,7 @@ class RequirementAgent(BaseAgent):
         
         brief_text = project_state.brief.brief_content
 
-        if GROQ_API_KEY:
+        if GROQ_API_KEY and self.can_use_llm(project_state):
             try:
                 self.update_status("working", "Consulting AI Model (Groq Llama 3)...")
                 system_prompt = """
@@ -24,9 +24,25 @@ class RequirementAgent(BaseAgent):
                 - description: string
                 - priority: "High" | "Medium" | "Low"
                 - acceptance_criteria: list of strings
-                """
+                """ + brief_index.example_for(project_state, "srs")
                 
-                response = await generate_json(system_prompt, brief_text)
+                # Publish requirements as they stream in so pollers see progress early
+                project_state.srs = SRS(project_id=project_state.id, requirements=[])
+
+                def on_requirement(r):
+                    try:
+                        project_state.srs.requirements.append(Requirement(
+                            id=f"REQ-{len(project_state.srs.requirements)+1:03d}",
+                            description=r['description'],
+                            priority=r['priority'],
+                            acceptance_criteria=r['acceptance_criteria']
+                        ))
+                    except Exception:
+                        return
+                    project_state.touch()
+                    self.update_status("working", f"Extracted {len(project_state.srs.requirements)} requirements...")
+
+                response = await generate_json(system_prompt, brief_text, stream_key="requirements", on_item=on_requirement, route="requirements", schema=RequirementsDraft)
                 req_data = response.get("requirements", [])
                 
                 requirements = []
@@ -45,10 +61,12 @@ class RequirementAgent(BaseAgent):
                 
             except Exception as e:
                 print(f"LLM Failed, falling back to heuristics: {e}")
+                self.mark_degraded(project_state, e)
+                project_state.srs = None
                 # Fallthrough to heuristic logic below
 
         # Simulate processing time if not using LLM
-        await asyncio.sleep(1.5)
+        await self.simulate_work(project_state, 1.5)
         
         # Heuristic 1: Split by common delimiters (., ;, and) to find actionable items
         import re
@@ -1,6 +1,5 @@
 from .base import BaseAgent
 from ..models import ProjectState
-import asyncio
 import random
 
 class RoleAssignmentAgent(BaseAgent):
@@ -13,7 +12,7 @@ class RoleAssignmentAgent(BaseAgent):
              return project_state
 
         self.update_status("working", "Assigning roles to tasks...")
-        await asyncio.sleep(1)
+        await self.simulate_work(project_state, 1)
         
         for task in project_state.plan.tasks:
             name_lower = task.name.lower()
@@ -0,0 +1,67 @@
+"""
+Cold-start benchmark: how long a fresh interpreter takes to import the app.
+
+    python -m backend.bench_startup [--runs 5] [--budget-ms 1500] [--top 15]
+
+Exits non-zero when the median import time is over budget.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+_TIMED_IMPORT = "import time; t = time.perf_counter(); import backend.main; print((time.perf_counter() - t) * 1000)"
+
+
+def time_import() -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", _TIMED_IMPORT], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def slowest_imports(top: int):
+    """(cumulative ms, module) for the heaviest imports, from `-X importtime`."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import backend.main"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, raw_name = line[len("import time:"):].split("|")
+        # Nesting is shown as two spaces per level; keep the app and what it imports directly
+        depth = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        if depth > 1:
+            continue
+        rows.append((int(cumulative) / 1000, raw_name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=float(os.environ.get("STARTUP_BUDGET_MS", "1500")))
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    time_import()  # warm the .pyc cache
+    samples = [time_import() for _ in range(args.runs)]
+    median = statistics.median(samples)
+
+    print(f"import backend.main: median {median:.0f} ms, min {min(samples):.0f} ms, max {max(samples):.0f} ms over {args.runs} runs")
+    print("\nSlowest imports (cumulative ms):")
+    for ms, name in slowest_imports(args.top):
+        print(f"  {ms:8.1f}  {name}")
+
+    within = median <= args.budget_ms
+    print(f"\nBudget {args.budget_ms:.0f} ms: {'OK' if within else 'OVER'}")
+    sys.exit(0 if within else 1)
+
+
+if __name__ == "__main__":
+    main()
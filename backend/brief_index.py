@@ -0,0 +1,136 @@
+import os
+import zlib
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List, Optional, Set, Tuple
+
+from .models import ProjectState, WarmStart
+from .project_store import project_store
+from .similarity import ngrams
+
+# "fewshot": show the earlier SRS/plan to the LLM as an example
+# "reuse":   copy the earlier SRS/plan and skip those LLM stages
+# "off":     always run cold
+WARM_START_MODE = os.environ.get("WARM_START_MODE", "fewshot")
+WARM_START_THRESHOLD = float(os.environ.get("WARM_START_THRESHOLD", "0.85"))
+# Briefs indexed at once; the oldest drop out (about 1 KB of signature each)
+BRIEF_INDEX_MAX_ENTRIES = int(os.environ.get("BRIEF_INDEX_MAX_ENTRIES", "10000"))
+
+NUM_PERM = 128
+BANDS = 32  # 32 bands x 4 rows: pairs above ~0.45 Jaccard become candidates
+ROWS = NUM_PERM // BANDS
+
+# Universal hashing (a*x + b) mod p over 32-bit shingle hashes. a, b < 2^32
+# keeps a*x + b inside uint64. Fixed seed so signatures are stable.
+_PRIME = np.uint64(4294967311)
+_rng = np.random.default_rng(20240601)
+_A = _rng.integers(1, 2**32 - 1, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, 2**32 - 1, NUM_PERM, dtype=np.uint64)
+
+
+def minhash(text: str) -> np.ndarray:
+    grams = ngrams(text, n=4)
+    x = np.fromiter((zlib.crc32(g.encode()) for g in grams), dtype=np.uint64, count=len(grams))
+    return ((_A[:, None] * x[None, :] + _B[:, None]) % _PRIME).min(axis=1)
+
+
+class BriefIndex:
+    """
+    MinHash/LSH index of completed project briefs. Only signatures are held;
+    the SRS and plan are read from the project store when a match is used.
+    """
+
+    def __init__(self, max_entries: int = BRIEF_INDEX_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.signatures: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.buckets: Dict[Tuple[int, bytes], Set[str]] = {}
+        self.stats = {"lookups": 0, "matches": 0, "reused": 0, "fewshot": 0, "llm_calls_saved": 0}
+
+    def _bands(self, signature: np.ndarray):
+        for band in range(BANDS):
+            yield band, signature[band * ROWS:(band + 1) * ROWS].tobytes()
+
+    def add(self, project_id: str, brief: str):
+        self.remove(project_id)
+        signature = self.signatures[project_id] = minhash(brief)
+        for key in self._bands(signature):
+            self.buckets.setdefault(key, set()).add(project_id)
+        while len(self.signatures) > self.max_entries:
+            self.remove(next(iter(self.signatures)))
+
+    def remove(self, project_id: str):
+        signature = self.signatures.pop(project_id, None)
+        if signature is None:
+            return
+        for key in self._bands(signature):
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                bucket.discard(project_id)
+                if not bucket:
+                    del self.buckets[key]
+
+    def _source(self, project_id: str) -> Optional[ProjectState]:
+        """The indexed project if it still has an SRS and plan to offer."""
+        project = project_store.get(project_id)
+        if project is None or not project.srs or not project.plan:
+            self.remove(project_id)
+            return None
+        return project
+
+    def query(self, brief: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """Most similar indexed briefs as (project_id, estimated Jaccard similarity)."""
+        signature = minhash(brief)
+        candidates = set()
+        for key in self._bands(signature):
+            candidates |= self.buckets.get(key, set())
+        scored = [
+            (pid, float(np.mean(self.signatures[pid] == signature)))
+            for pid in candidates
+        ]
+        scored.sort(key=lambda s: s[1], reverse=True)
+        return scored[:limit]
+
+    def warm_start(self, project_state: ProjectState) -> Optional[WarmStart]:
+        """
+        Attach a warm start to a new project if an earlier brief is similar
+        enough. In reuse mode the stored SRS and plan are copied onto it.
+        """
+        if WARM_START_MODE not in ("fewshot", "reuse"):
+            return None
+        self.stats["lookups"] += 1
+        matches = self.query(project_state.brief.brief_content, limit=1)
+        if not matches or matches[0][1] < WARM_START_THRESHOLD:
+            return None
+
+        source_id, similarity = matches[0]
+        source = self._source(source_id)
+        if source is None:
+            return None
+        self.stats["matches"] += 1
+        if WARM_START_MODE == "fewshot":
+            self.stats["fewshot"] += 1
+        else:
+            self.stats["reused"] += 1
+            project_state.srs = source.srs.model_copy(deep=True, update={"project_id": project_state.id})
+            project_state.plan = source.plan.model_copy(deep=True, update={"project_id": project_state.id})
+            self.stats["llm_calls_saved"] += 2  # requirements + planning
+
+        project_state.warm_start = WarmStart(
+            source_project_id=source_id, similarity=round(similarity, 3), mode=WARM_START_MODE
+        )
+        return project_state.warm_start
+
+    def example_for(self, project_state: ProjectState, kind: str) -> str:
+        """Few-shot block with the warm-start source's SRS ("srs") or plan ("plan")."""
+        warm = project_state.warm_start
+        source = self._source(warm.source_project_id) if warm and warm.mode == "fewshot" else None
+        if not source:
+            return ""
+        if kind == "srs":
+            body = "\n".join(f"- {r.description} ({r.priority})" for r in source.srs.requirements)
+        else:
+            body = "\n".join(f"- {t.name}: {t.estimated_days} days" for t in source.plan.tasks)
+        return f"\n\nFor reference, a very similar earlier project brief was:\n{source.brief.brief_content}\nIts {kind.upper()} was:\n{body}\nAdapt it to the new brief rather than copying it blindly."
+
+
+brief_index = BriefIndex()
@@ -0,0 +1,165 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+# Record/replay of LLM traffic.
+#   record: every completion request/response pair (with timings) is appended to LLM_CASSETTE
+#   replay: completions are served from LLM_CASSETTE; no network, SDK or API key needed
+LLM_CASSETTE_MODE = os.environ.get("LLM_CASSETTE_MODE", "").lower()
+LLM_CASSETTE = os.environ.get("LLM_CASSETTE", "llm_cassette.jsonl")
+# Replay with the recorded latencies (and chunk timings for streams) instead of instantly
+LLM_REPLAY_TIMING = os.environ.get("LLM_REPLAY_TIMING", "0") == "1"
+
+
+class CassetteMiss(Exception):
+    pass
+
+
+class RecordedError(Exception):
+    """An LLM error that was recorded and is being replayed."""
+
+
+def request_key(kwargs: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(kwargs, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _completion(content: str, usage: Optional[dict]):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+        usage=SimpleNamespace(**usage) if usage else None,
+    )
+
+
+def _chunk(text: str):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+class Cassette:
+    """
+    JSONL file of recorded completions, keyed by a hash of the request
+    arguments. Identical requests are replayed in recorded order; once a
+    key's recordings run out, its last one is served again.
+    """
+
+    def __init__(self, path: str, mode: str):
+        self.path = path
+        self.mode = mode
+        self.entries: Dict[str, List[dict]] = {}
+        self.served: Dict[str, int] = {}
+        if mode == "replay":
+            self._load()
+
+    def _load(self):
+        with open(self.path) as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self.entries.setdefault(entry["key"], []).append(entry)
+        print(f"LLM cassette: replaying {sum(map(len, self.entries.values()))} recordings from {self.path}")
+
+    def append(self, entry: dict):
+        with open(self.path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    def next_for(self, key: str) -> dict:
+        recordings = self.entries.get(key)
+        if not recordings:
+            raise CassetteMiss(f"No recording for request {key[:12]} in {self.path}")
+        i = self.served.get(key, 0)
+        self.served[key] = i + 1
+        return recordings[min(i, len(recordings) - 1)]
+
+
+class _Completions:
+    def __init__(self, cassette: Cassette, completions=None):
+        self.cassette = cassette
+        self.completions = completions  # real SDK endpoint when recording
+
+    async def create(self, **kwargs):
+        key = request_key(kwargs)
+        if self.cassette.mode == "replay":
+            return await self._replay(self.cassette.next_for(key), kwargs.get("stream", False))
+        return await self._record(key, kwargs)
+
+    async def _replay(self, entry: dict, stream: bool):
+        if not stream:
+            if LLM_REPLAY_TIMING:
+                await asyncio.sleep(entry["latency"])
+            if "error" in entry:
+                raise RecordedError(entry["error"])
+            return _completion(entry["content"], entry.get("usage"))
+
+        async def chunks():
+            start = time.monotonic()
+            for offset, text in entry["chunks"]:
+                if LLM_REPLAY_TIMING:
+                    await asyncio.sleep(max(0.0, offset - (time.monotonic() - start)))
+                yield _chunk(text)
+            if "error" in entry:
+                raise RecordedError(entry["error"])
+
+        if LLM_REPLAY_TIMING:
+            await asyncio.sleep(entry.get("first_byte", 0))
+        return chunks()
+
+    async def _record(self, key: str, kwargs: dict):
+        entry = {"key": key, "model": kwargs.get("model"), "request": kwargs, "recorded_at": time.time()}
+        start = time.monotonic()
+        try:
+            response = await self.completions.create(**kwargs)
+        except Exception as e:
+            entry.update(latency=time.monotonic() - start, error=repr(e), chunks=[])
+            self.cassette.append(entry)
+            raise
+        if not kwargs.get("stream"):
+            usage = getattr(response, "usage", None)
+            entry.update(
+                latency=time.monotonic() - start,
+                content=response.choices[0].message.content,
+                usage={k: getattr(usage, k, None) for k in ("prompt_tokens", "completion_tokens", "total_tokens")} if usage else None,
+            )
+            self.cassette.append(entry)
+            return response
+        entry["first_byte"] = time.monotonic() - start
+        return self._record_stream(entry, response, start)
+
+    async def _record_stream(self, entry: dict, stream, start: float):
+        chunks = entry["chunks"] = []
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    chunks.append([time.monotonic() - start, chunk.choices[0].delta.content])
+                yield chunk
+        except Exception as e:
+            entry["error"] = repr(e)
+            raise
+        finally:
+            # Abandoned streams (cancelled callers) are kept with what arrived
+            entry["latency"] = time.monotonic() - start
+            self.cassette.append(entry)
+
+
+async def _no_models():
+    return SimpleNamespace(data=[])
+
+
+class CassetteClient:
+    """Stands in for AsyncGroq: records through `client`, or replays without one."""
+
+    def __init__(self, cassette: Cassette, client=None):
+        self.chat = SimpleNamespace(completions=_Completions(cassette, client.chat.completions if client else None))
+        self.models = client.models if client else SimpleNamespace(list=_no_models)
+
+
+_cassette: Optional[Cassette] = None
+
+
+def cassette_client(client=None) -> CassetteClient:
+    global _cassette
+    if _cassette is None:
+        _cassette = Cassette(LLM_CASSETTE, LLM_CASSETTE_MODE)
+    return CassetteClient(_cassette, client)
@@ -0,0 +1,82 @@
+import os
+import re
+import hashlib
+import numpy as np
+from collections import OrderedDict
+from typing import FrozenSet, Optional
+
+from .similarity import hashed_vector
+
+# Cosine similarity above which two questions count as the same question
+CHAT_CACHE_THRESHOLD = float(os.environ.get("CHAT_CACHE_THRESHOLD", "0.9"))
+CHAT_CACHE_MAX_ENTRIES = 64
+# Projects with a cache at once; the least recently used one is dropped
+CHAT_CACHE_MAX_PROJECTS = 256
+
+# IDs and numbers ("REQ-001", "10 days"): questions only match if these agree
+_IDENTIFIER = re.compile(r"[A-Za-z]+-\d+|\d+(?:\.\d+)?")
+
+
+def _identifiers(question: str) -> FrozenSet[str]:
+    return frozenset(m.upper() for m in _IDENTIFIER.findall(question))
+
+
+class ProjectAnswerCache:
+    """
+    Answers to past /chat questions for one project, matched by hashed
+    n-gram similarity among questions naming the same IDs and numbers. Tied
+    to a fingerprint of the project context the answers were generated
+    from; a different fingerprint clears it.
+    """
+
+    def __init__(self):
+        self.fingerprint: Optional[str] = None
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.questions = []
+        self.identifiers = []
+        self.answers = []
+
+    def _sync(self, fingerprint: str):
+        if fingerprint != self.fingerprint:
+            self.fingerprint = fingerprint
+            self.vectors = np.zeros((0, 0), dtype=np.float32)
+            self.questions, self.identifiers, self.answers = [], [], []
+
+    def lookup(self, question: str, fingerprint: str) -> Optional[str]:
+        self._sync(fingerprint)
+        if not self.answers:
+            return None
+        scores = self.vectors @ hashed_vector(question)
+        ids = _identifiers(question)
+        scores[[other != ids for other in self.identifiers]] = -1.0
+        best = int(np.argmax(scores))
+        if scores[best] >= CHAT_CACHE_THRESHOLD:
+            return self.answers[best]
+        return None
+
+    def store(self, question: str, answer: str, fingerprint: str):
+        self._sync(fingerprint)
+        vec = hashed_vector(question)[None, :]
+        self.vectors = vec if not self.answers else np.vstack([self.vectors, vec])[-CHAT_CACHE_MAX_ENTRIES:]
+        self.questions = (self.questions + [question])[-CHAT_CACHE_MAX_ENTRIES:]
+        self.identifiers = (self.identifiers + [_identifiers(question)])[-CHAT_CACHE_MAX_ENTRIES:]
+        self.answers = (self.answers + [answer])[-CHAT_CACHE_MAX_ENTRIES:]
+
+
+_caches: "OrderedDict[str, ProjectAnswerCache]" = OrderedDict()
+
+
+def context_fingerprint(context: str) -> str:
+    return hashlib.sha1(context.encode()).hexdigest()
+
+
+def answer_cache(project_id: Optional[str]) -> ProjectAnswerCache:
+    """The project's cache; `None` (no or unknown project) shares one cache."""
+    key = project_id or ""
+    cache = _caches.get(key)
+    if cache is None:
+        cache = _caches[key] = ProjectAnswerCache()
+        if len(_caches) > CHAT_CACHE_MAX_PROJECTS:
+            _caches.popitem(last=False)
+    _caches.move_to_end(key)
+    return cache
@@ -0,0 +1,98 @@
+import os
+import asyncio
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+# Prompt budget (approximate tokens) for the conversation history sent with
+# each /chat message: rolling summary plus the recent turns kept verbatim.
+CHAT_HISTORY_TOKENS = int(os.environ.get("CHAT_HISTORY_TOKENS", "1500"))
+SUMMARY_TOKENS = 300
+KEEP_MESSAGES = 4  # last two exchanges always stay verbatim
+MAX_SESSIONS = 1000
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for budgeting
+    return len(text) // 4 + 1
+
+
+def _clip(text: str, tokens: int) -> str:
+    limit = tokens * 4
+    return text if len(text) <= limit else text[:limit].rstrip() + "…"
+
+
+class ChatSession:
+    """
+    One conversation about a project. Recent turns are kept verbatim; once
+    they exceed the budget, older turns are folded into a rolling summary.
+    """
+
+    def __init__(self, session_id: str):
+        self.id = session_id
+        self.summary = ""
+        self.turns: List[Dict[str, str]] = []
+        self._compaction: Optional[asyncio.Task] = None
+
+    @property
+    def is_new(self) -> bool:
+        return not self.turns and not self.summary
+
+    def history(self) -> List[Dict[str, str]]:
+        """Verbatim recent turns as chat messages, clipped to the budget."""
+        per_message = max((CHAT_HISTORY_TOKENS - SUMMARY_TOKENS) // KEEP_MESSAGES, 50)
+        return [{"role": t["role"], "content": _clip(t["content"], per_message)} for t in self.turns]
+
+    def add_exchange(self, question: str, answer: str):
+        self.turns.append({"role": "user", "content": question})
+        self.turns.append({"role": "assistant", "content": answer})
+        if self._over_budget() and not (self._compaction and not self._compaction.done()):
+            # Off the request path: the next message pays no summarization latency
+            self._compaction = asyncio.create_task(self.compact())
+
+    def _over_budget(self) -> bool:
+        used = estimate_tokens(self.summary) + sum(estimate_tokens(t["content"]) for t in self.turns)
+        return used > CHAT_HISTORY_TOKENS and len(self.turns) > KEEP_MESSAGES
+
+    async def compact(self):
+        fold = self.turns[:-KEEP_MESSAGES]
+        if not fold:
+            return
+        self.summary = await _summarize(self.summary, fold)
+        # Turns added while summarizing are at the end; drop only what was folded
+        del self.turns[:len(fold)]
+
+
+async def _summarize(summary: str, turns: List[Dict[str, str]]) -> str:
+    transcript = "\n".join(f"{t['role'].title()}: {t['content']}" for t in turns)
+    try:
+        from .llm import generate_completion
+        new_summary = await generate_completion(
+            "You maintain a running summary of a conversation between a user and a software project assistant. "
+            f"Merge the new turns into the summary. Keep decisions, numbers and open questions. Under {SUMMARY_TOKENS * 3 // 4} words.",
+            f"Current summary:\n{summary or '(none)'}\n\nNew turns:\n{transcript}",
+            route="chat.summary",
+        )
+    except Exception as e:
+        print(f"Chat summary LLM error, using extractive summary: {e}")
+        lines = [f"- {t['role']}: {_clip(t['content'], 25)}" for t in turns]
+        new_summary = "\n".join(filter(None, [summary] + lines))
+        # Keep the most recent part when the extractive summary overflows
+        return new_summary[-SUMMARY_TOKENS * 4:]
+    return _clip(new_summary.strip(), SUMMARY_TOKENS)
+
+
+_sessions: "OrderedDict[Tuple[str, str], ChatSession]" = OrderedDict()
+
+
+def get_session(project_id: Optional[str], session_id: Optional[str]) -> ChatSession:
+    """Session for (project, session id); a new one is created for unknown ids."""
+    session_id = session_id or str(uuid.uuid4())
+    key = (project_id or "", session_id)
+    session = _sessions.get(key)
+    if session is None:
+        session = _sessions[key] = ChatSession(session_id)
+        if len(_sessions) > MAX_SESSIONS:
+            _sessions.popitem(last=False)
+    _sessions.move_to_end(key)
+    return session
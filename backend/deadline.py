@@ -0,0 +1,52 @@
+import os
+import time
+from contextvars import ContextVar, Token
+from typing import Optional
+
+# Default wall-clock budget for one project run (POST /projects?deadline=...)
+DEFAULT_PROJECT_DEADLINE = float(os.environ.get("PROJECT_DEADLINE_SECONDS", "120"))
+MAX_PROJECT_DEADLINE = 900.0
+# Extra time the orchestrator allows past the deadline before abandoning the run
+DEADLINE_GRACE_SECONDS = 5.0
+# Don't start an LLM call with less time than this left
+MIN_LLM_SECONDS = float(os.environ.get("LLM_MIN_SECONDS", "3"))
+
+# Monotonic deadline of the project run the current task belongs to.
+# Context variables are copied into child tasks, so this reaches every
+# agent and LLM call spawned by the orchestrator.
+_deadline: ContextVar[Optional[float]] = ContextVar("project_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+def set_deadline(seconds: float) -> Token:
+    return _deadline.set(time.monotonic() + seconds)
+
+
+def reset_deadline(token: Token):
+    _deadline.reset(token)
+
+
+def time_left() -> Optional[float]:
+    """Seconds until the current deadline, or None when there isn't one."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def has_time_for(seconds: float = MIN_LLM_SECONDS) -> bool:
+    left = time_left()
+    return left is None or left >= seconds
+
+
+def bounded_timeout(timeout: float) -> float:
+    """Clamp a call timeout to the time left, failing fast if too little is left."""
+    left = time_left()
+    if left is None:
+        return timeout
+    if left < MIN_LLM_SECONDS:
+        raise DeadlineExceeded(f"{max(left, 0):.1f}s left before project deadline")
+    return min(timeout, left)
@@ -0,0 +1,103 @@
+import re
+import zipfile
+from typing import Iterator, List
+
+from .models import ProjectState
+from .storage import blob_store
+
+READ_CHUNK = 64 * 1024
+
+
+class _ChunkSink:
+    """
+    Write-only, unseekable file object for ZipFile. zipfile then writes
+    data descriptors instead of seeking back, so the archive can be
+    emitted front to back and drained after every write.
+    """
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "-", name).strip("-") or "project"
+
+
+def _readme(project: ProjectState) -> str:
+    lines = [f"# {project.brief.name}", "", project.brief.description, "", "## Brief", "", project.brief.brief_content, ""]
+    if project.srs:
+        lines += ["## Requirements", ""]
+        lines += [f"- **{r.id}** ({r.priority}): {r.description}" for r in project.srs.requirements]
+        lines.append("")
+    if project.plan:
+        lines += [
+            "## Plan", "",
+            f"Estimated {project.plan.total_estimated_days} days, ${project.plan.estimated_cost:,.2f}. See `plan.json`.",
+            "",
+        ]
+        lines += [f"- {t.name} ({t.estimated_days}d, {t.assigned_role or 'unassigned'})" for t in project.plan.tasks]
+        lines.append("")
+    lines.append("Generated by AutoSDLC.")
+    return "\n".join(lines) + "\n"
+
+
+def export_filename(project: ProjectState) -> str:
+    return f"{_slug(project.brief.name)}.zip"
+
+
+def _entry_path(path: str) -> str:
+    # Generated paths come from the LLM; keep them inside the archive root
+    return "/".join(p for p in path.replace("\\", "/").split("/") if p not in ("", ".", ".."))
+
+
+def iter_project_zip(project: ProjectState) -> Iterator[bytes]:
+    """
+    Yield a ZIP of the project's generated files, a README and plan.json,
+    entry by entry. File contents are streamed from the blob store in
+    READ_CHUNK pieces, so memory use doesn't grow with the artifact set.
+    """
+    for chunk in _zip_chunks(project):
+        if chunk:
+            yield chunk
+
+
+def _zip_chunks(project: ProjectState) -> Iterator[bytes]:
+    root = _slug(project.brief.name)
+    files = dict(project.artifacts.files) if project.artifacts else {}
+    sink = _ChunkSink()
+
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        readme_name = "AUTOSDLC_README.md" if "README.md" in files else "README.md"
+        zf.writestr(f"{root}/{readme_name}", _readme(project))
+        yield sink.drain()
+        if project.plan:
+            zf.writestr(f"{root}/plan.json", project.plan.model_dump_json(indent=2))
+            yield sink.drain()
+
+        for path, ref in files.items():
+            if not blob_store.exists(ref.digest):
+                continue
+            with open(blob_store.path_for(ref.digest), "rb") as src, \
+                    zf.open(f"{root}/{_entry_path(path)}", "w") as dest:
+                while True:
+                    block = src.read(READ_CHUNK)
+                    if not block:
+                        break
+                    dest.write(block)
+                    yield sink.drain()
+            yield sink.drain()
+
+    # Central directory
+    yield sink.drain()
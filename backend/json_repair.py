@@ -0,0 +1,124 @@
+import json
+import re
+from typing import Any, List, Tuple
+
+_CLOSERS = {"{": "}", "[": "]"}
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_ESCAPES = {"\n": "\\n", "\r": "\\r", "\t": "\\t"}
+
+
+def repair_json(text: str) -> Any:
+    """
+    Parse an LLM's JSON output, tolerating the usual damage: markdown fences
+    and prose around the document, trailing commas, Python literals, single
+    quotes, raw newlines inside strings and truncation (open brackets are
+    closed; a value cut off mid-string is dropped along with its key, so a
+    schema follow-up asks for it again rather than keeping half a sentence).
+    Raises ValueError when nothing usable is left.
+    """
+    start = min((p for p in (text.find("{"), text.find("[")) if p >= 0), default=-1)
+    if start < 0:
+        raise ValueError("No JSON document in completion")
+    try:
+        return json.JSONDecoder().raw_decode(text, start)[0]
+    except json.JSONDecodeError:
+        pass
+
+    out, cut_points, stack, in_string = _rewrite(text[start:])
+    cuts = [(i, s, False) for i, s in reversed(cut_points)]
+    whole = (len(out), stack, in_string)
+    # Ended inside a string: back to the last complete element first
+    candidates = cuts + [whole] if in_string else [whole] + cuts
+    for end, open_stack, open_string in candidates:
+        body = "".join(out[:end])
+        if open_string:
+            body += '"'
+        body = re.sub(r"[\s,:]+$", "", body)
+        try:
+            return json.loads(body + "".join(_CLOSERS[c] for c in reversed(open_stack)))
+        except json.JSONDecodeError:
+            continue
+    raise ValueError("Could not repair JSON completion")
+
+
+def _rewrite(text: str) -> Tuple[List[str], List[Tuple[int, List[str]]], List[str], bool]:
+    """
+    Normalise the document in one pass. Returns the rewritten characters,
+    the places it can be cut back to (before each comma and nested opening
+    bracket and just inside the outermost one, with the bracket stack
+    there), and the stack / open-string state at the end.
+    """
+    out: List[str] = []
+    cut_points: List[Tuple[int, List[str]]] = []
+    stack: List[str] = []
+    quote = None  # '"' or "'" while inside a string
+    escape = False
+    i = 0
+    while i < len(text):
+        c = text[i]
+        if quote:
+            if escape:
+                escape = False
+                if quote == "'" and c == "'":
+                    out[-1] = "'"  # \' inside a single-quoted string is just '
+                else:
+                    out.append(c)
+            elif c == "\\":
+                escape = True
+                out.append(c)
+            elif c == quote:
+                quote = None
+                out.append('"')
+            elif c == '"':
+                out.append('\\"')  # only reachable inside single-quoted strings
+            else:
+                out.append(_ESCAPES.get(c, c))
+            i += 1
+            continue
+
+        if c in "\"'":
+            quote = c
+            out.append('"')
+        elif c in "{[":
+            if stack:
+                # A nested element cut off inside goes as a whole, not as {}
+                cut_points.append((len(out), list(stack)))
+            stack.append(c)
+            out.append(c)
+            if len(stack) == 1:
+                cut_points.append((len(out), list(stack)))
+        elif c in "}]":
+            if c in (_CLOSERS[s] for s in stack):
+                while stack:
+                    opener = stack.pop()
+                    _strip_trailing_comma(out)
+                    out.append(_CLOSERS[opener])
+                    if _CLOSERS[opener] == c:
+                        break
+                if not stack:
+                    break  # document complete; ignore whatever follows
+        elif c == ",":
+            cut_points.append((len(out), list(stack)))
+            out.append(c)
+        elif c.isalpha() or c == "_":
+            j = i
+            while j < len(text) and (text[j].isalnum() or text[j] == "_"):
+                j += 1
+            word = text[i:j]
+            out.append(_LITERALS.get(word, word))
+            i = j
+            continue
+        else:
+            out.append(c)
+        i += 1
+    if escape:
+        out.pop()  # truncated right after a backslash
+    return out, cut_points, stack, quote is not None
+
+
+def _strip_trailing_comma(out: List[str]):
+    j = len(out) - 1
+    while j >= 0 and out[j].isspace():
+        j -= 1
+    if j >= 0 and out[j] == ",":
+        del out[j]
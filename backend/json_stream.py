@@ -0,0 +1,124 @@
+import json
+from typing import Any, List, Optional
+
+from .json_repair import repair_json
+
+
+class JSONItemStream:
+    """
+    Incremental JSON parser that hands out the elements of one array as soon
+    as each element is complete, while the rest of the document is still
+    being generated.
+
+    With key=None the document itself is expected to be an array; otherwise
+    the array is the value of `key` on the top-level object. Anything before
+    the document (e.g. a stray markdown fence) is ignored.
+    """
+
+    def __init__(self, key: Optional[str] = None):
+        self.key = key
+        self.items: List[Any] = []
+        self._text = ""
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = -1
+        self._last_string: Optional[str] = None
+        self._current_key: Optional[str] = None
+        self._target_depth: Optional[int] = None
+        self._target_done = False
+        self._item_start = -1
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Consume more text and return the elements completed by it."""
+        self._text += chunk
+        text = self._text
+        found = []
+        i = self._pos
+        while i < len(text):
+            c = text[i]
+            depth = len(self._stack)
+            at_target = self._target_depth is not None and depth == self._target_depth
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if depth == 1 and self._stack[0] == "{":
+                        self._last_string = self._loads(text[self._string_start:i + 1])
+                    if at_target and self._item_start == self._string_start:
+                        self._emit(text[self._item_start:i + 1], found)
+                i += 1
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+                if at_target and self._item_start < 0:
+                    self._item_start = i
+            elif c in "{[":
+                if at_target and self._item_start < 0:
+                    self._item_start = i
+                if c == "[" and self._is_target_open():
+                    self._target_depth = depth + 1
+                self._stack.append(c)
+            elif c in "}]":
+                if at_target and c == "]":
+                    # End of the target array; flush a trailing scalar
+                    if self._item_start >= 0:
+                        self._emit(text[self._item_start:i], found)
+                    self._target_depth = None
+                    self._target_done = True
+                if self._stack:
+                    self._stack.pop()
+                if (self._target_depth is not None and len(self._stack) == self._target_depth
+                        and self._item_start >= 0):
+                    self._emit(text[self._item_start:i + 1], found)
+            elif c == ",":
+                if at_target and self._item_start >= 0:
+                    self._emit(text[self._item_start:i], found)
+            elif c == ":":
+                if depth == 1 and self._stack[0] == "{":
+                    self._current_key = self._last_string
+            elif not c.isspace():
+                # Number / true / false / null element
+                if at_target and self._item_start < 0:
+                    self._item_start = i
+            i += 1
+
+        self._pos = i
+        return found
+
+    def document(self) -> Any:
+        """Parse the full buffered document once the stream has finished, repairing it if damaged."""
+        return repair_json(self._text)
+
+    def _is_target_open(self) -> bool:
+        if self._target_done or self._target_depth is not None:
+            return False
+        if self.key is None:
+            return not self._stack
+        return len(self._stack) == 1 and self._stack[0] == "{" and self._current_key == self.key
+
+    def _emit(self, raw: str, found: List[Any]):
+        self._item_start = -1
+        raw = raw.strip()
+        if not raw:
+            return
+        try:
+            item = json.loads(raw)
+        except json.JSONDecodeError:
+            return  # Malformed element: skip it, keep streaming the rest
+        self.items.append(item)
+        found.append(item)
+
+    @staticmethod
+    def _loads(raw: str) -> Optional[str]:
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError:
+            return None
@@ -1,32 +1,132 @@
 import os
-from groq import Groq
-from dotenv import load_dotenv
+import asyncio
+import time
 import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Type
 
-load_dotenv()
+from pydantic import BaseModel, ValidationError
 
-# Read API Key from environment variable
-GROQ_API_KEY = os.environ.get("GROQ_API_KEY", "")
+from .json_stream import JSONItemStream
+from .json_repair import repair_json
+from .llm_routing import MODEL_TIERS, TIER_TIMEOUTS, tier_for, other_tier, tier_stats
+from .llm_hedging import hedged, hedge_delay, route_stats
+from .deadline import bounded_timeout
+from .tracing import span
+from .cassette import LLM_CASSETTE_MODE, cassette_client
+
+# Read API Key from environment variable. Replaying a cassette needs no key,
+# but the agents only take the LLM path when one is set.
+GROQ_API_KEY = os.environ.get("GROQ_API_KEY", "") or ("replay" if LLM_CASSETTE_MODE == "replay" else "")
+
+# Stream JSON completions so callers can start on array items early.
+# Set LLM_STREAM_JSON=0 to always wait for the full completion.
+STREAM_JSON = os.environ.get("LLM_STREAM_JSON", "1") != "0"
 
 def set_api_key(key: str):
     global GROQ_API_KEY
     GROQ_API_KEY = key
 
+_client = None
+_client_key = None  # (api key, event loop) the cached client belongs to
+
 def get_llm_client():
+    """
+    Shared AsyncGroq client, so calls reuse its connection pool. The groq
+    SDK is only imported on first use to keep process start-up fast.
+    With LLM_CASSETTE_MODE set, the client records to or replays from a cassette.
+    """
+    global _client, _client_key
     if not GROQ_API_KEY:
         return None
-    return Groq(api_key=GROQ_API_KEY)
+    try:
+        key = (GROQ_API_KEY, asyncio.get_running_loop())
+    except RuntimeError:
+        key = None
+    if _client is None or key is None or key != _client_key:
+        if LLM_CASSETTE_MODE == "replay":
+            _client = cassette_client()
+        else:
+            from groq import AsyncGroq
+            _client = AsyncGroq(api_key=GROQ_API_KEY)
+            if LLM_CASSETTE_MODE == "record":
+                _client = cassette_client(_client)
+        _client_key = key
+    return _client
 
-async def generate_completion(system_prompt: str, user_prompt: str, model: str = "llama-3.3-70b-versatile") -> str:
+async def _routed(
+    route: Optional[str],
+    model: Optional[str],
+    call: Callable[[str], Awaitable[Any]],
+    can_fallback: Callable[[], bool] = lambda: True,
+    hedge: bool = False,
+    prompt_chars: int = 0,
+) -> Any:
+    """
+    Run `call(model)` on the tier the route maps to. On error or timeout the
+    call is retried once on the other tier. An explicit `model` skips routing.
+    With `hedge`, slow calls may be duplicated (see llm_hedging).
+    Timeouts are clamped to the project deadline, if one is set.
+    """
+    tier = tier_for(route)
+    if model:
+        attempts = [(tier, model)]
+    else:
+        attempts = [(tier, MODEL_TIERS[tier]), (other_tier(tier), MODEL_TIERS[other_tier(tier)])]
+
+    last_error = None
+    for i, (tier, model) in enumerate(attempts):
+        if i > 0:
+            if not can_fallback():
+                break
+            tier_stats[tier].fallbacks += 1
+            print(f"LLM falling back to {tier} tier ({model}) for {route}: {last_error!r}")
+
+        with span(f"llm {route or model}", "llm", model=model, tier=tier, attempt=i + 1,
+                  prompt_chars=prompt_chars, hedge=hedge) as args:
+            timeout = bounded_timeout(TIER_TIMEOUTS[tier])
+            stats = (tier_stats[tier], route_stats(route, tier))
+            start = time.perf_counter()
+            try:
+                if hedge:
+                    attempt = hedged(lambda: call(model), hedge_delay(stats[1]))
+                else:
+                    attempt = call(model)
+                result = await asyncio.wait_for(attempt, timeout)
+            except asyncio.TimeoutError as e:
+                for s in stats:
+                    s.record(time.perf_counter() - start, "timeout")
+                args["outcome"] = "timeout"
+                last_error = e
+            except Exception as e:
+                for s in stats:
+                    s.record(time.perf_counter() - start, "error")
+                args["outcome"] = "error"
+                args["error"] = repr(e)
+                last_error = e
+            else:
+                for s in stats:
+                    s.record(time.perf_counter() - start)
+                args["outcome"] = "ok"
+                return result
+    raise last_error
+
+async def generate_completion(
+    system_prompt: str,
+    user_prompt: str,
+    model: Optional[str] = None,
+    route: Optional[str] = None,
+    history: Optional[List[Dict[str, str]]] = None,
+) -> str:
     client = get_llm_client()
     if not client:
         raise ValueError("API Key not set")
-    
-    try:
-        completion = client.chat.completions.create(
+
+    async def call(model: str) -> str:
+        completion = await client.chat.completions.create(
             model=model,
             messages=[
                 {"role": "system", "content": system_prompt},
+                *(history or []),
                 {"role": "user", "content": user_prompt}
             ],
             temperature=0.7,
@@ -36,26 +136,125 @@ async def generate_completion(system_prompt: str, user_prompt: str, model: str =
             stop=None,
         )
         return completion.choices[0].message.content
+
+    try:
+        prompt_chars = len(system_prompt) + len(user_prompt) + sum(len(m["content"]) for m in history or [])
+        return await _routed(route, model, call, hedge=True, prompt_chars=prompt_chars)
     except Exception as e:
         print(f"Groq API Error: {e}")
         raise e
 
-async def generate_json(system_prompt: str, user_prompt: str, model: str = "llama-3.3-70b-versatile") -> dict:
-    """Helper to get JSON response"""
+async def generate_json(
+    system_prompt: str,
+    user_prompt: str,
+    model: Optional[str] = None,
+    stream_key: Optional[str] = None,
+    on_item: Optional[Callable[[Any], None]] = None,
+    route: Optional[str] = None,
+    schema: Optional[Type[BaseModel]] = None,
+) -> dict:
+    """
+    Helper to get JSON response.
+
+    With `stream_key` and `on_item`, every element of the top-level array
+    under `stream_key` is passed to `on_item` as soon as it is complete,
+    before the rest of the completion has arrived.
+
+    Damaged JSON (fences, trailing commas, truncation...) is repaired rather
+    than discarded. With `schema`, the result is validated and, if fields are
+    missing or invalid, one follow-up call asks for just those to be filled.
+    """
     client = get_llm_client()
     if not client:
         raise ValueError("API Key not set")
 
+    messages = [
+        {"role": "system", "content": system_prompt + "\nIMPORTANT: Return ONLY valid JSON. No markdown formatting."},
+        {"role": "user", "content": user_prompt}
+    ]
+
+    prompt_chars = sum(len(m["content"]) for m in messages)
     try:
-        completion = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": system_prompt + "\nIMPORTANT: Return ONLY valid JSON. No markdown formatting."},
-                {"role": "user", "content": user_prompt}
-            ],
-            response_format={"type": "json_object"}
-        )
-        return json.loads(completion.choices[0].message.content)
+        if stream_key and on_item and STREAM_JSON:
+            emitted = []
+
+            def forward(item):
+                emitted.append(item)
+                on_item(item)
+
+            # Once items have been handed out a retry would duplicate them
+            data = await _routed(
+                route, model,
+                lambda model: _stream_json(client, messages, model, stream_key, forward),
+                can_fallback=lambda: not emitted,
+                prompt_chars=prompt_chars,
+            )
+        else:
+            async def call(model: str) -> dict:
+                try:
+                    completion = await client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        response_format={"type": "json_object"}
+                    )
+                except Exception as e:
+                    # JSON mode rejects invalid output but reports what was generated
+                    failed = _failed_generation(e)
+                    if failed is None:
+                        raise
+                    return repair_json(failed)
+                return repair_json(completion.choices[0].message.content)
+
+            data = await _routed(route, model, call, hedge=True, prompt_chars=prompt_chars)
+        return await _conform(data, schema, system_prompt, user_prompt) if schema else data
     except Exception as e:
         print(f"Groq JSON Error: {e}")
         raise e
+
+def _failed_generation(error: Exception) -> Optional[str]:
+    body = getattr(error, "body", None)
+    detail = body.get("error", body) if isinstance(body, dict) else None
+    failed = detail.get("failed_generation") if isinstance(detail, dict) else None
+    return failed if isinstance(failed, str) and failed.strip() else None
+
+async def _conform(data: Any, schema: Type[BaseModel], system_prompt: str, user_prompt: str) -> dict:
+    """Validate against `schema`; if that fails, one follow-up asks the LLM to fix only the listed fields."""
+    try:
+        return schema.model_validate(data).model_dump()
+    except ValidationError as e:
+        problems = "\n".join(f"- {'.'.join(map(str, err['loc'])) or '(document)'}: {err['msg']}" for err in e.errors())
+
+    print(f"LLM JSON incomplete, requesting missing fields:\n{problems}")
+    fixed = await generate_json(
+        "You complete partially generated JSON. Return the same JSON document with the listed problems fixed: "
+        "fill in missing fields and correct invalid values in the spirit of the original task. "
+        "Keep every other value exactly as it is.\n\n"
+        f"Original task:\n{system_prompt.strip()}\n\nOriginal input:\n{user_prompt[:2000]}",
+        f"Partial JSON:\n{json.dumps(data)}\n\nProblems:\n{problems}",
+        route="json.repair",
+    )
+    return schema.model_validate(fixed).model_dump()
+
+async def _stream_json(client, messages, model: str, stream_key: str, on_item: Callable[[Any], None]) -> dict:
+    # JSON mode is not available for streamed completions, the prompt carries the format
+    parser = JSONItemStream(stream_key)
+    stream = await client.chat.completions.create(model=model, messages=messages, stream=True)
+    try:
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            for item in parser.feed(chunk.choices[0].delta.content or ""):
+                on_item(item)
+    finally:
+        # Release the connection right away, also when the run is cancelled mid-stream
+        close = getattr(stream, "close", None) or getattr(stream, "aclose", None)
+        if close:
+            await close()
+
+    try:
+        return parser.document()
+    except ValueError:
+        # Truncated or malformed tail: keep the elements that did parse
+        if not parser.items:
+            raise
+        return {stream_key: parser.items}
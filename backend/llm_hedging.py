@@ -0,0 +1,96 @@
+import os
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .llm_routing import LatencyStats
+
+# Send a duplicate request when a call is slower than this percentile of
+# observed latency for its route on the same tier. Off unless LLM_HEDGE=1.
+HEDGE_ENABLED = os.environ.get("LLM_HEDGE", "0") == "1"
+HEDGE_PERCENTILE = float(os.environ.get("LLM_HEDGE_PERCENTILE", "95"))
+# Hedges may add at most this fraction of extra requests
+HEDGE_BUDGET = float(os.environ.get("LLM_HEDGE_BUDGET", "0.1"))
+# Don't hedge until the route has enough latency samples to trust
+HEDGE_MIN_SAMPLES = int(os.environ.get("LLM_HEDGE_MIN_SAMPLES", "20"))
+
+
+class HedgeBudget:
+    """Caps hedged requests to a fraction of all requests."""
+
+    def __init__(self, ratio: float):
+        self.ratio = ratio
+        self.calls = 0
+        self.hedges = 0
+        self.wins = 0
+
+    def try_acquire(self) -> bool:
+        if self.hedges + 1 > self.ratio * self.calls:
+            return False
+        self.hedges += 1
+        return True
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": HEDGE_ENABLED,
+            "percentile": HEDGE_PERCENTILE,
+            "budget": self.ratio,
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.wins,
+        }
+
+
+hedge_budget = HedgeBudget(HEDGE_BUDGET)
+
+# Per (route, tier): a tier's window mixes short JSON calls with long file
+# and chat completions, whose normal latency would look like outliers
+_route_stats: Dict[Tuple[str, str], LatencyStats] = {}
+
+
+def route_stats(route: Optional[str], tier: str) -> LatencyStats:
+    key = (route or "", tier)
+    stats = _route_stats.get(key)
+    if stats is None:
+        stats = _route_stats[key] = LatencyStats()
+    return stats
+
+
+def hedge_delay(stats: LatencyStats) -> Optional[float]:
+    if not HEDGE_ENABLED or len(stats.samples) < HEDGE_MIN_SAMPLES:
+        return None
+    return stats.percentile(HEDGE_PERCENTILE)
+
+
+async def hedged(call: Callable[[], Awaitable[Any]], delay: Optional[float]) -> Any:
+    """
+    Await `call()`. If it hasn't finished after `delay` seconds and the
+    budget allows, start a duplicate; the first success wins and the
+    other request is cancelled.
+    """
+    hedge_budget.calls += 1
+    primary = asyncio.ensure_future(call())
+    if delay is None:
+        return await primary
+
+    hedge = None
+    try:
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not hedge_budget.try_acquire():
+            return await primary
+
+        hedge = asyncio.ensure_future(call())
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is hedge:
+                        hedge_budget.wins += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in (primary, hedge):
+            if task is not None and not task.done():
+                task.cancel()
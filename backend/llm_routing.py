@@ -0,0 +1,88 @@
+import os
+from collections import deque
+from typing import Dict, Optional
+
+# Model behind each latency tier
+MODEL_TIERS = {
+    "fast": os.environ.get("LLM_FAST_MODEL", "llama-3.1-8b-instant"),
+    "large": os.environ.get("LLM_LARGE_MODEL", "llama-3.3-70b-versatile"),
+}
+
+# Seconds before a call on a tier is abandoned and retried on the other tier
+TIER_TIMEOUTS = {
+    "fast": float(os.environ.get("LLM_TIMEOUT_FAST", "20")),
+    "large": float(os.environ.get("LLM_TIMEOUT_LARGE", "90")),
+}
+
+# Call site -> tier. Cheap, structured steps go to the fast model;
+# anything whose output quality users see directly stays on the large one.
+ROUTES = {
+    "requirements": "large",
+    "planning": "large",
+    "coding.structure": "fast",
+    "coding.file": "large",
+    "prototype.copy": "fast",
+    "chat": "large",
+    "chat.summary": "fast",
+    "json.repair": "fast",
+}
+
+DEFAULT_TIER = "large"
+
+
+def tier_for(route: Optional[str]) -> str:
+    return ROUTES.get(route, DEFAULT_TIER) if route else DEFAULT_TIER
+
+
+def other_tier(tier: str) -> str:
+    return "large" if tier == "fast" else "fast"
+
+
+class LatencyStats:
+    """Rolling latency window and outcome counters for one tier (or route)."""
+
+    def __init__(self, window: int = 200):
+        self.samples = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.fallbacks = 0
+
+    def record(self, seconds: float, outcome: str = "ok"):
+        self.calls += 1
+        if outcome == "ok":
+            self.samples.append(seconds)
+        elif outcome == "timeout":
+            self.timeouts += 1
+        else:
+            self.errors += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        idx = min(int(q / 100 * len(ordered)), len(ordered) - 1)
+        return ordered[idx]
+
+    def snapshot(self) -> dict:
+        def ms(v):
+            return round(v * 1000, 1) if v is not None else None
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "fallbacks": self.fallbacks,
+            "p50_ms": ms(self.percentile(50)),
+            "p95_ms": ms(self.percentile(95)),
+            "mean_ms": ms(sum(self.samples) / len(self.samples)) if self.samples else None,
+        }
+
+
+tier_stats: Dict[str, LatencyStats] = {tier: LatencyStats() for tier in MODEL_TIERS}
+
+
+def routing_snapshot() -> dict:
+    return {
+        tier: {"model": MODEL_TIERS[tier], **tier_stats[tier].snapshot()}
+        for tier in MODEL_TIERS
+    }
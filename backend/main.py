@@ -1,25 +1,69 @@
-from fastapi import FastAPI, BackgroundTasks, HTTPException, Request
+import time
+_IMPORT_STARTED = time.perf_counter()
+
+from dotenv import load_dotenv
+
+# Load .env once, before any backend module reads its settings
+load_dotenv()
+
+from fastapi import FastAPI, HTTPException, Request, Query, Header, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, StreamingResponse, PlainTextResponse, HTMLResponse
 from pydantic import BaseModel
-from dotenv import load_dotenv
+from contextlib import asynccontextmanager
 from pathlib import Path
 import asyncio
+import importlib
+import secrets
 import uuid
 import os
-from typing import Dict, List, Optional
+from typing import Dict, List, Literal, Optional
 
-from .models import ProjectBrief, ProjectState
-from .agents.requirement_agent import RequirementAgent
-from .agents.planning_agent import PlanningAgent
-from .agents.role_agent import RoleAssignmentAgent
-from .agents.coding_agent import CodingAgent
-from .agents.prototype_agent import PrototypeAgent
+from .models import ProjectBrief, ProjectState, RiskEstimate
+from .agents.base import BaseAgent
+from .storage import blob_store
+from .export import iter_project_zip, export_filename
+from .response_cache import response_cache
+from .project_store import project_store
+from .project_events import project_watchers
+from .rate_limit import RateLimitMiddleware, admission
+from .tracing import start_trace, use_trace, end_trace, get_trace, span, instant
+from .profiling import profiler, loop_monitor
+from .deadline import (
+    DEFAULT_PROJECT_DEADLINE, MAX_PROJECT_DEADLINE, DEADLINE_GRACE_SECONDS, set_deadline, reset_deadline
+)
 
-load_dotenv()
+# Warm the LLM connection and agents in the background after start-up
+PREWARM = os.environ.get("PREWARM", "0") == "1"
+# Shared secret for /admin endpoints (X-Admin-Token header); unset disables them
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+# On shutdown, how long running projects get to finish before they are
+# stopped at their last checkpoint (and resumed on the next start)
+SHUTDOWN_DRAIN_SECONDS = float(os.environ.get("SHUTDOWN_DRAIN_SECONDS", "10"))
+
+_startup = {"ready": False, "startup_ms": None, "prewarm": "enabled" if PREWARM else "disabled"}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # With PREWARM, not ready until the warm-up has run (see _prewarm)
+    _startup["ready"] = not PREWARM
+    _startup["startup_ms"] = round((time.perf_counter() - _IMPORT_STARTED) * 1000, 1)
+    prewarm_task = asyncio.create_task(_prewarm()) if PREWARM else None
+    loop_monitor.start()
+    _resume_runs()
+    yield
+    _startup["ready"] = False  # stop new traffic while draining
+    await _drain_runs()
+    loop_monitor.stop()
+    if prewarm_task:
+        prewarm_task.cancel()
 
-app = FastAPI(title="AutoSDLC API", version="0.1.0")
+app = FastAPI(title="AutoSDLC API", version="0.1.0", lifespan=lifespan)
+
+# Rate limiting / load shedding. Added before CORS so CORS wraps it and
+# 429/503 responses still carry CORS headers.
+app.add_middleware(RateLimitMiddleware)
 
 # CORS
 app.add_middleware(
@@ -28,17 +72,96 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
-# In-memory storage (Replace with DB later)
-projects_db: Dict[str, ProjectState] = {}
+# Recently used projects in memory, the rest spilled to disk (see project_store)
+projects_db = project_store
+
+# Stage runs in flight, by project id, and the ones cancelled through the API
+_runs: Dict[str, asyncio.Future] = {}
+_cancelled: set = set()
+# Tasks running run_orchestration, by project id, so shutdown can drain them.
+# Not request background tasks: the server waits for those before shutdown.
+_orchestrations: Dict[str, asyncio.Task] = {}
+
+def _start_run(project_id: str):
+    task = _orchestrations[project_id] = asyncio.create_task(run_orchestration(project_id))
 
-# Initialize Agents
-req_agent = RequirementAgent()
-plan_agent = PlanningAgent()
-role_agent = RoleAssignmentAgent()
-code_agent = CodingAgent()
-prototype_agent = PrototypeAgent()
+    def done(_):
+        if _orchestrations.get(project_id) is task:
+            del _orchestrations[project_id]
+    task.add_done_callback(done)
+
+def _resume_runs():
+    """Restart runs a previous process left unfinished, from their last completed stage."""
+    for project_id in projects_db.active_ids():
+        try:
+            state = projects_db.get(project_id)
+        except ValueError as e:  # invalid JSON, or a checkpoint from another schema
+            print(f"Cannot resume project {project_id}, quarantining its checkpoint: {e}")
+            projects_db.quarantine(project_id)
+            continue
+        if state is None or state.status not in ("brief_submitted", "in_progress"):
+            projects_db.mark_done(project_id)
+            continue
+        state.resumed += 1
+        print(f"Resuming project {project_id} after stages: {', '.join(state.completed_stages) or 'none'}")
+        _start_run(project_id)
+
+async def _drain_runs():
+    """
+    Give running projects SHUTDOWN_DRAIN_SECONDS to finish, then cancel them;
+    they are checkpointed as they stop and resume on the next start.
+    """
+    tasks = set(_orchestrations.values())
+    if not tasks:
+        return
+    print(f"Draining {len(tasks)} running project(s)...")
+    _, pending = await asyncio.wait(tasks, timeout=SHUTDOWN_DRAIN_SECONDS)
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.wait(pending)
+
+# Agents are imported and built on first use, so the process can take
+# traffic without loading the LLM SDK, numpy and every agent module.
+_AGENT_CLASSES = {
+    "requirements": ("requirement_agent", "RequirementAgent"),
+    "planning": ("planning_agent", "PlanningAgent"),
+    "roles": ("role_agent", "RoleAssignmentAgent"),
+    "coding": ("coding_agent", "CodingAgent"),
+    "prototype": ("prototype_agent", "PrototypeAgent"),
+}
+_agents: Dict[str, BaseAgent] = {}
+
+def get_agent(key: str) -> BaseAgent:
+    agent = _agents.get(key)
+    if agent is None:
+        module_name, class_name = _AGENT_CLASSES[key]
+        module = importlib.import_module(f".agents.{module_name}", __package__)
+        agent = _agents[key] = getattr(module, class_name)()
+    return agent
+
+async def _prewarm():
+    """Load agents, open the LLM connection and render the prototype template once."""
+    _startup["prewarm"] = "running"
+    try:
+        for key in _AGENT_CLASSES:
+            get_agent(key)
+        for module in ("brief_index", "chat_cache", "simulation"):  # numpy users
+            importlib.import_module(f".{module}", __package__)
+        from .llm import get_llm_client
+        client = get_llm_client()
+        if client:
+            await asyncio.wait_for(client.models.list(), 10)
+        get_agent("prototype")._build_page("Warm-up", {})
+        _startup["prewarm"] = "done"
+    except Exception as e:
+        print(f"Prewarm failed: {e}")
+        _startup["prewarm"] = "failed"
+    # A failed warm-up only means slower first requests; still ready
+    _startup["ready"] = True
 
 @app.get("/")
 def read_root():
@@ -50,76 +173,464 @@ def read_root():
 
 @app.get("/health")
 def health_check():
+    """Liveness: the process is up."""
     return {"status": "ok"}
 
+@app.get("/ready")
+def readiness_check():
+    """Readiness: start-up (and prewarm, when enabled) has finished and the app accepts traffic."""
+    if not _startup["ready"]:
+        return Response(status_code=503)
+    return {"status": "ready", **_startup}
+
+@app.get("/llm/stats")
+def llm_stats():
+    """Per-tier model, latency percentiles, fallback, hedging and admission counts."""
+    from .llm_routing import routing_snapshot
+    from .llm_hedging import hedge_budget
+    from .brief_index import brief_index
+    from .requirement_dedup import dedup_stats
+    return {
+        "tiers": routing_snapshot(),
+        "hedging": hedge_budget.snapshot(),
+        "warm_start": brief_index.stats,
+        "admission": admission.snapshot(),
+        "project_cache": projects_db.snapshot(),
+        "requirement_dedup": dedup_stats,
+    }
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+@app.get("/admin/profile", dependencies=[Depends(require_admin)], response_class=PlainTextResponse)
+async def admin_profile(
+    seconds: float = Query(10, gt=0, le=60),
+    interval_ms: float = Query(10, ge=1, le=1000),
+):
+    """
+    Sample all thread stacks for `seconds` and return collapsed stacks
+    (load into speedscope or flamegraph.pl). One capture at a time.
+    """
+    try:
+        folded = await profiler.profile(seconds, interval_ms / 1000)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return PlainTextResponse(folded, headers={"Content-Disposition": 'inline; filename="profile.folded"'})
+
+@app.get("/admin/loop-lag", dependencies=[Depends(require_admin)])
+def admin_loop_lag():
+    """Event-loop stalls over LOOP_LAG_THRESHOLD_MS, with the stack that blocked."""
+    return loop_monitor.snapshot()
+
 async def run_orchestration(project_id: str):
     """
-    Orchestrate the agents sequentially.
+    Orchestrate the agents. Requirements come first; planning/roles and
+    code generation only depend on the SRS, so they run concurrently.
+
+    The whole run is bounded by the project deadline: LLM calls are clamped
+    to the time left and agents fall back to heuristics when it runs short.
     """
+    from .brief_index import brief_index
+
+    if projects_db[project_id].status == "cancelled":  # cancelled before it started
+        projects_db.mark_done(project_id)
+        return
+    # Pinned while running: agents hold this object, it must not be spilled
+    projects_db.pin(project_id)
     state = projects_db[project_id]
-    
-    # Step 1: Requirements
-    state = await req_agent.process(state)
-    projects_db[project_id] = state 
-    
-    # Step 2: Planning
-    state = await plan_agent.process(state)
+    state.status = "in_progress"
+    state.touch()
+    deadline = state.deadline_seconds or DEFAULT_PROJECT_DEADLINE
+    token = set_deadline(deadline)
+    trace_token = start_trace(project_id)
+    try:
+        # Near-duplicate of an earlier brief: few-shot it or reuse its SRS/plan
+        if state.mode == "full" and not state.completed_stages and brief_index.warm_start(state):
+            instant("warm start", "cache", **state.warm_start.model_dump())
+            state.touch()
+        with span("orchestration", "run", deadline=deadline):
+            run = _runs[project_id] = asyncio.ensure_future(
+                asyncio.wait_for(_run_stages(project_id, state), deadline + DEADLINE_GRACE_SECONDS)
+            )
+            await run
+        state.status = "completed"
+        # Only LLM-written SRS/plans are worth few-shotting later briefs with
+        if state.mode == "full" and state.srs and state.plan and not state.degraded_stages and not _reused(state):
+            brief_index.add(project_id, state.brief.brief_content)
+    except asyncio.TimeoutError:
+        state.status = "timed_out"
+        state.degraded_stages.setdefault("Orchestrator", "hard deadline reached")
+    except asyncio.CancelledError:
+        if project_id not in _cancelled:
+            raise  # shutdown, not a user cancel
+        state.status = "cancelled"
+    finally:
+        _runs.pop(project_id, None)
+        _cancelled.discard(project_id)
+        reset_deadline(token)
+        end_trace(trace_token, export=True)
+        state.touch()
+        if state.mode == "full":
+            projects_db.checkpoint(project_id)
+            # Still in progress means shutdown stopped it; leave it to be resumed
+            if state.status != "in_progress":
+                projects_db.mark_done(project_id)
+        projects_db.unpin(project_id)
+
+def _reused(state: ProjectState) -> bool:
+    return state.warm_start is not None and state.warm_start.mode == "reuse"
+
+def _save(project_id: str, state: ProjectState, stage: Optional[str] = None):
+    """Publish the state; after a finished `stage`, also checkpoint it to disk."""
+    if stage:
+        state.completed_stages.append(stage)
+    state.touch()
     projects_db[project_id] = state
+    if stage and state.mode == "full":
+        projects_db.checkpoint(project_id)
+
+async def _run_stages(project_id: str, state: ProjectState):
+    reused = _reused(state)
+    done = set(state.completed_stages)  # from a checkpoint, when resuming
+
+    # Step 1: Requirements (streamed into state.srs as they are extracted, for
+    # progress only: planning and coding prompt on the complete list), then
+    # near-duplicates merged so they don't inflate every later prompt
+    if not reused and "requirements" not in done:
+        from .requirement_dedup import dedupe_requirements
+        from .agents.coding_agent import MAX_CODE_FILES
+        state = await get_agent("requirements").process(state)
+        with span("requirement dedup", "stage") as args:
+            # The list is repeated in the plan, structure and every code file prompt
+            dedup = dedupe_requirements(state.srs, downstream_prompts=2 + MAX_CODE_FILES)
+            args["removed"] = dedup.removed if dedup else 0
+        _save(project_id, state, "requirements")
     
-    # Step 3: Role Assignment
-    state = await role_agent.process(state)
-    projects_db[project_id] = state
+    # Steps 2-3: Planning, then Role Assignment
+    async def plan_and_assign(state: ProjectState):
+        if not reused and "planning" not in done:
+            state = await get_agent("planning").process(state)
+            _save(project_id, state, "planning")
+        if "roles" not in done:
+            _save(project_id, await get_agent("roles").process(state), "roles")
 
-    # Step 4: Coding Agent
-    state = await code_agent.process(state)
-    projects_db[project_id] = state
+    # Step 4: Coding Agent, overlapped with steps 2-3
+    async def write_code(state: ProjectState):
+        if "coding" not in done:
+            _save(project_id, await get_agent("coding").process(state), "coding")
+
+    await asyncio.gather(plan_and_assign(state), write_code(state))
 
 @app.post("/projects", response_model=ProjectState)
-async def create_project(brief: ProjectBrief, background_tasks: BackgroundTasks):
+async def create_project(
+    brief: ProjectBrief,
+    deadline: Optional[float] = Query(None, gt=0, le=MAX_PROJECT_DEADLINE),
+    mode: Literal["full", "fast"] = "full",
+):
     """
     Submit a new project brief and start the automation.
+    `deadline` caps the run in seconds (default PROJECT_DEADLINE_SECONDS).
+    `mode=fast` skips the LLM and simulated delays and runs the heuristic
+    pipeline inline, returning the completed project.
     """
-    new_project = ProjectState(brief=brief)
+    new_project = ProjectState(brief=brief, deadline_seconds=deadline or DEFAULT_PROJECT_DEADLINE, mode=mode)
     projects_db[new_project.id] = new_project
-    
-    # Trigger agents in background
-    background_tasks.add_task(run_orchestration, new_project.id)
+
+    if mode == "fast":
+        await run_orchestration(new_project.id)
+        return Response(response_cache.encode(projects_db[new_project.id]), media_type="application/json")
+
+    # On disk and marked active first, so a restart before the run starts still picks it up
+    projects_db.checkpoint(new_project.id)
+    projects_db.mark_active(new_project.id)
+
+    # Run in the background, tracked so shutdown can drain/checkpoint it
+    _start_run(new_project.id)
     
     return new_project
 
+@app.post("/projects/{project_id}/cancel", response_model=ProjectState)
+async def cancel_project(project_id: str):
+    """
+    Stop a running project: cancels its stages, and with them every LLM
+    call in flight, plus any on-demand file generation for it.
+    """
+    if project_id not in projects_db:
+        raise HTTPException(status_code=404, detail="Project not found")
+    project = projects_db[project_id]
+    get_agent("coding").cancel_pending(project_id)
+    run = _runs.get(project_id)
+    if run is not None:
+        _cancelled.add(project_id)
+        run.cancel()
+        await asyncio.wait({run})
+    elif project.status != "brief_submitted":  # not queued or running
+        raise HTTPException(status_code=409, detail=f"Project is not running ({project.status})")
+    project.status = "cancelled"
+    project.touch()
+    # Persisted now: a queued project never reaches the run's own checkpoint,
+    # and a restart must not resume it
+    projects_db.checkpoint(project_id)
+    projects_db.mark_done(project_id)
+    return Response(response_cache.encode(project), media_type="application/json")
+
 @app.get("/projects", response_model=List[ProjectState])
 def list_projects():
-    return list(projects_db.values())
+    def body():
+        yield b"["
+        for i, data in enumerate(projects_db.iter_json()):
+            yield b"," + data if i else data
+        yield b"]"
+    # Streamed: spilled projects are copied from disk, not loaded into memory
+    return StreamingResponse(body(), media_type="application/json")
+
+# Longest a long-poll request may be held open
+MAX_POLL_WAIT = 60.0
+# Part of every ETag: a resumed run restarts from its last checkpoint's
+# version, so version numbers served by an earlier process mean nothing now
+_BOOT_EPOCH = secrets.token_hex(4)
+
+def _etag(project: ProjectState) -> str:
+    return f'"{project.id}:{_BOOT_EPOCH}:{project.version}"'
+
+def _version_from_etags(header: Optional[str], project_id: str) -> Optional[int]:
+    """Version named by an ETag this process served for the project, if any."""
+    for tag in (header or "").split(","):
+        pid, epoch, version = (tag.strip().removeprefix("W/").strip('"').rsplit(":", 2) + ["", ""])[:3]
+        if pid == project_id and epoch == _BOOT_EPOCH and version.isdigit():
+            return int(version)
+    return None
+
+@app.get("/projects/{project_id}", response_model=ProjectState)
+async def get_project(
+    project_id: str,
+    request: Request,
+    wait: float = Query(0, ge=0, le=MAX_POLL_WAIT),
+    since: Optional[str] = None,
+):
+    """
+    Project state with an ETag tied to its version; `If-None-Match` on an
+    unchanged project gets a 304. With `wait`, the request is held until the
+    version moves past `since` (an ETag value, else the If-None-Match one)
+    or `wait` seconds pass. ETags from an earlier process never match.
+    """
+    if project_id not in projects_db:
+        raise HTTPException(status_code=404, detail="Project not found")
+    project = projects_db[project_id]
+    if_none_match = request.headers.get("if-none-match")
+
+    seen = _version_from_etags(since if since is not None else if_none_match, project_id)
+    if wait and seen is not None:
+        until = time.monotonic() + wait
+        while project.version <= seen and (left := until - time.monotonic()) > 0:
+            await project_watchers.wait(project_id, left)
+            project = projects_db.get(project_id, project)
+
+    etag = _etag(project)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _version_from_etags(if_none_match, project_id) == project.version:
+        return Response(status_code=304, headers=headers)
+    # Served from pre-encoded bytes; re-encoded only when the version changes
+    return Response(response_cache.encode(project), media_type="application/json", headers=headers)
+
+@app.get("/projects/{project_id}/risk", response_model=RiskEstimate)
+async def get_project_risk(
+    project_id: str,
+    iterations: int = Query(100_000, ge=1, le=1_000_000),
+    seed: Optional[int] = None,
+):
+    """
+    Monte Carlo (PERT) P50/P80/P95 duration and cost for the project plan.
+    """
+    if project_id not in projects_db:
+        raise HTTPException(status_code=404, detail="Project not found")
+    project = projects_db[project_id]
+    if not project.plan:
+        raise HTTPException(status_code=409, detail="Project has no plan yet")
+    from .simulation import simulate_plan
+    # Up to a million NumPy iterations: off the event loop, on a snapshot of
+    # the plan (the store and a running run stay on the loop)
+    plan = project.plan.model_copy(deep=True)
+    return await asyncio.to_thread(simulate_plan, plan, iterations=iterations, seed=seed)
+
+def _parse_range(header: str, size: int):
+    """(start, end) inclusive for a single `bytes=a-b` range, or None if unsatisfiable."""
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if not first:  # suffix range: last N bytes
+            length = int(last)
+            return (max(size - length, 0), size - 1) if length > 0 and size else None
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    except ValueError:
+        return None
+    return (start, end) if start <= end else None
 
-@app.get("/projects/{project_id}")
-async def get_project(project_id: str):
+@app.get("/projects/{project_id}/files/{file_path:path}")
+async def get_project_file(project_id: str, file_path: str, request: Request):
+    """
+    Contents of one generated file, loaded from the blob store on demand.
+    Files listed in the structure that the pipeline didn't write are
+    generated on first request (an LLM request for rate limiting); without
+    the LLM a placeholder is served and nothing is stored, so a later
+    request can still generate it. Supports single `Range: bytes=` requests.
+    """
     if project_id not in projects_db:
         raise HTTPException(status_code=404, detail="Project not found")
-    return projects_db[project_id]
+    project = projects_db[project_id]
+    artifacts = project.artifacts
+    ref = artifacts.files.get(file_path) if artifacts else None
+    if not ref and artifacts and file_path in artifacts.file_structure:
+        coding = get_agent("coding")
+        if not coding.can_generate(project):
+            return PlainTextResponse(f"# TODO: Implement {file_path}", headers={"Cache-Control": "no-store"})
+        retry_after = admission.charge(request.scope, "llm")
+        if retry_after:
+            raise HTTPException(status_code=429, detail="Rate limit exceeded", headers={"Retry-After": str(max(1, round(retry_after)))})
+        token = use_trace(project_id)
+        projects_db.pin(project_id)
+        try:
+            ref = await coding.generate_file(project, file_path)
+        except Exception as e:
+            raise HTTPException(status_code=503, detail=f"Could not generate {file_path}: {e}")
+        finally:
+            projects_db.unpin(project_id)
+            end_trace(token)
+    if not ref or not blob_store.exists(ref.digest):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    headers = {"ETag": f'"{ref.digest}"', "Accept-Ranges": "bytes", "Cache-Control": "private, max-age=31536000, immutable"}
+    media_type = "text/plain; charset=utf-8"
+    range_header = request.headers.get("range")
+    if not range_header:
+        return FileResponse(blob_store.path_for(ref.digest), media_type=media_type, headers=headers)
+
+    byte_range = _parse_range(range_header, ref.size)
+    if byte_range is None:
+        return Response(status_code=416, headers={"Content-Range": f"bytes */{ref.size}"})
+    start, end = byte_range
+    with open(blob_store.path_for(ref.digest), "rb") as f:
+        f.seek(start)
+        chunk = f.read(end - start + 1)
+    headers["Content-Range"] = f"bytes {start}-{end}/{ref.size}"
+    return Response(chunk, status_code=206, media_type=media_type, headers=headers)
+
+@app.get("/projects/{project_id}/export.zip")
+def export_project(project_id: str):
+    """Download the generated project as a ZIP, streamed entry by entry."""
+    if project_id not in projects_db:
+        raise HTTPException(status_code=404, detail="Project not found")
+    project = projects_db[project_id]
+    return StreamingResponse(
+        iter_project_zip(project),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{export_filename(project)}"'},
+    )
+
+@app.get("/projects/{project_id}/similar")
+async def get_similar_projects(project_id: str, limit: int = Query(5, ge=1, le=50)):
+    """Earlier projects with near-duplicate briefs and their similarity scores."""
+    if project_id not in projects_db:
+        raise HTTPException(status_code=404, detail="Project not found")
+    from .brief_index import brief_index
+
+    brief = projects_db[project_id].brief.brief_content
+    matches = [m for m in brief_index.query(brief, limit=limit + 1) if m[0] != project_id][:limit]
+    return {
+        "matches": [{"project_id": pid, "similarity": round(score, 3)} for pid, score in matches],
+        "warm_start": projects_db[project_id].warm_start,
+    }
 
 @app.post("/prototype/{project_id}")
 async def generate_prototype(project_id: str):
     if project_id not in projects_db:
         raise HTTPException(status_code=404, detail="Project not found")
     project = projects_db[project_id]
-    result = await prototype_agent.process(project)
-    return result
+    token = use_trace(project_id)
+    try:
+        return await get_agent("prototype").process(project)
+    finally:
+        end_trace(token)
+
+@app.get("/prototype/{project_id}/html", response_class=HTMLResponse)
+async def stream_prototype(project_id: str, request: Request):
+    """
+    The prototype page as streamed text/html, for use as an iframe src: the
+    head, CSS and nav arrive at once, the sections when the LLM copy is ready.
+    The copy is cached per project, so only a view that has to generate it
+    counts as an LLM request.
+    """
+    if project_id not in projects_db:
+        raise HTTPException(status_code=404, detail="Project not found")
+    project = projects_db[project_id]
+    agent = get_agent("prototype")
+    if agent.needs_llm(project):
+        retry_after = admission.charge(request.scope, "llm")
+        if retry_after:
+            raise HTTPException(status_code=429, detail="Rate limit exceeded", headers={"Retry-After": str(max(1, round(retry_after)))})
+
+    async def body():
+        token = use_trace(project_id)
+        try:
+            async for chunk in agent.stream(project):
+                yield chunk
+        finally:
+            end_trace(token)
+
+    # no-transform/X-Accel-Buffering: keep proxies from buffering the early chunks
+    return StreamingResponse(body(), media_type="text/html", headers={
+        "Cache-Control": "no-store, no-transform",
+        "X-Accel-Buffering": "no",
+    })
+
+@app.get("/projects/{project_id}/trace")
+def get_project_trace(project_id: str):
+    """
+    Timeline of the project's last run (agent stages, LLM calls, fallbacks)
+    in Chrome trace format; open it in chrome://tracing or ui.perfetto.dev.
+    """
+    if project_id not in projects_db:
+        raise HTTPException(status_code=404, detail="Project not found")
+    trace = get_trace(project_id)
+    if trace is None:
+        return {"traceEvents": [], "displayTimeUnit": "ms"}
+    return trace.chrome()
 
 
 class ChatMessage(BaseModel):
     message: str
     project_id: Optional[str] = None
+    session_id: Optional[str] = None
 
 @app.post("/chat")
 async def chat(msg: ChatMessage):
-    from .llm import generate_completion, GROQ_API_KEY
+    from .llm import GROQ_API_KEY
+    from .chat_sessions import get_session
     
     if not GROQ_API_KEY:
         return {"reply": "AI is not configured. Please set your Groq API key."}
     
+    session = get_session(msg.project_id, msg.session_id)
+    trace_token = use_trace(msg.project_id)
+    try:
+        return await _chat_reply(msg, session)
+    finally:
+        end_trace(trace_token)
+
+async def _chat_reply(msg: ChatMessage, session) -> dict:
+    from .llm import generate_completion
+    from .chat_cache import answer_cache, context_fingerprint
+
     # Build context from current project if available
     context = ""
-    if msg.project_id and msg.project_id in projects_db:
+    known_project = bool(msg.project_id) and msg.project_id in projects_db
+    if known_project:
         proj = projects_db[msg.project_id]
         context += f"\nProject Brief: {proj.brief.brief_content}"
         if proj.srs:
@@ -130,19 +641,35 @@ async def chat(msg: ChatMessage):
         if proj.artifacts:
             context += f"\nGenerated Files: {proj.artifacts.file_structure}"
     
+    # Near-duplicate questions against unchanged project context reuse the answer.
+    # Only for the opening message: later answers depend on the conversation.
+    fingerprint = context_fingerprint(context)
+    # Unknown ids have no context of their own: they share the no-project cache
+    cache = answer_cache(msg.project_id if known_project else None)
+    if session.is_new:
+        cached = cache.lookup(msg.message, fingerprint)
+        if cached is not None:
+            instant("chat answer cache hit", "cache")
+            session.add_exchange(msg.message, cached)
+            return {"reply": cached, "cached": True, "session_id": session.id}
+
+    summary = f"\n\nEarlier in this conversation:\n{session.summary}" if session.summary else ""
     system_prompt = f"""You are AutoSDLC Assistant, an AI expert in software development.
 You help users understand their project plans, suggest improvements, answer technical questions,
 and provide guidance on implementation.
 
-Current Project Context:{context if context else ' No project loaded yet.'}
+Current Project Context:{context if context else ' No project loaded yet.'}{summary}
 
 Be concise, helpful, and technical. Use markdown formatting."""
 
     try:
-        reply = await generate_completion(system_prompt, msg.message)
-        return {"reply": reply}
+        reply = await generate_completion(system_prompt, msg.message, route="chat", history=session.history())
+        if session.is_new:
+            cache.store(msg.message, reply, fingerprint)
+        session.add_exchange(msg.message, reply)
+        return {"reply": reply, "cached": False, "session_id": session.id}
     except Exception as e:
-        return {"reply": f"Sorry, I encountered an error: {str(e)}"}
+        return {"reply": f"Sorry, I encountered an error: {str(e)}", "session_id": session.id}
 
 # === STATIC FILE SERVING (Production) ===
 # Mount built React frontend if it exists (after npm run build)
@@ -1,8 +1,10 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import List, Optional, Dict, Literal
 from datetime import datetime
 import uuid
 
+from .project_events import project_watchers
+
 class ProjectBrief(BaseModel):
     name: str
     description: str
@@ -13,11 +15,19 @@ class Requirement(BaseModel):
     description: str
     priority: Literal["High", "Medium", "Low"]
     acceptance_criteria: List[str]
+    merged_from: List[str] = []  # ids of near-duplicates folded into this one
+
+class RequirementDedup(BaseModel):
+    removed: int
+    tokens_saved_per_prompt: int  # requirement text no longer sent with each prompt
+    estimated_tokens_saved: int  # over the planning and code-generation prompts of a run
 
 class SRS(BaseModel):
     project_id: str
     requirements: List[Requirement]
     generated_at: datetime = Field(default_factory=datetime.now)
+    duplicates: List[Requirement] = []  # folded requirements, kept for traceability
+    dedup: Optional[RequirementDedup] = None
 
 class WBSTask(BaseModel):
     id: str
@@ -26,12 +36,25 @@ class WBSTask(BaseModel):
     estimated_days: float
     dependencies: List[str] = []
     assigned_role: Optional[str] = None
+    optimistic_days: Optional[float] = None   # PERT lower bound
+    pessimistic_days: Optional[float] = None  # PERT upper bound
+    daily_rate: Optional[float] = None        # $/day used for the cost estimate
+
+class RiskEstimate(BaseModel):
+    iterations: int
+    duration_p50: float
+    duration_p80: float
+    duration_p95: float
+    cost_p50: float
+    cost_p80: float
+    cost_p95: float
 
 class ProjectPlan(BaseModel):
     project_id: str
     tasks: List[WBSTask]
     total_estimated_days: float
     estimated_cost: float
+    risk: Optional[RiskEstimate] = None
 
 class AgentStatus(BaseModel):
     agent_name: str
@@ -39,9 +62,18 @@ class AgentStatus(BaseModel):
     current_task: Optional[str] = None
     last_updated: datetime = Field(default_factory=datetime.now)
 
+class FileRef(BaseModel):
+    digest: str  # sha256 of the content in the blob store
+    size: int
+
 class Artifacts(BaseModel):
     file_structure: List[str] = []
-    code_snippets: Dict[str, str] = {} # filename -> content
+    files: Dict[str, FileRef] = {}  # filename -> blob reference
+
+class WarmStart(BaseModel):
+    source_project_id: str
+    similarity: float  # estimated Jaccard similarity of the briefs
+    mode: Literal["fewshot", "reuse"]
 
 class ProjectState(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -51,3 +83,66 @@ class ProjectState(BaseModel):
     artifacts: Optional[Artifacts] = None
     status: str = "brief_submitted"
     agent_statuses: Dict[str, AgentStatus] = {}
+    deadline_seconds: Optional[float] = None
+    mode: Literal["full", "fast"] = "full"  # fast: heuristics only, no LLM or simulated delays
+    degraded_stages: Dict[str, str] = {}  # agent name -> why it fell back to heuristics
+    warm_start: Optional[WarmStart] = None
+    completed_stages: List[str] = []  # checkpointed; a resumed run skips these
+    resumed: int = 0  # times the run was picked up again after a restart
+    version: int = 0  # bumped on every write, see touch()
+
+    def touch(self):
+        """Mark the state as changed; cached responses for older versions go stale."""
+        self.version += 1
+        project_watchers.notify(self.id)
+
+
+# Shapes the agents ask the LLM for. generate_json(schema=...) validates
+# completions against these and asks for whatever is missing.
+
+class RequirementDraft(BaseModel):
+    description: str
+    priority: Literal["High", "Medium", "Low"]
+    acceptance_criteria: List[str] = []
+
+    @field_validator("priority", mode="before")
+    @classmethod
+    def _capitalize(cls, v):
+        return v.strip().capitalize() if isinstance(v, str) else v
+
+class RequirementsDraft(BaseModel):
+    requirements: List[RequirementDraft] = Field(min_length=1)
+
+class TaskDraft(BaseModel):
+    name: str
+    description: str = ""
+    role_category: str = "backend"
+    days: float
+    days_optimistic: Optional[float] = None
+    days_pessimistic: Optional[float] = None
+    dependency: Optional[str] = None
+
+class PlanDraft(BaseModel):
+    complexity_score: float = 3
+    tasks: List[TaskDraft] = Field(min_length=1)
+
+class FileListDraft(BaseModel):
+    files: List[str] = Field(min_length=1)
+
+class CodeDraft(BaseModel):
+    code: str
+
+class FeatureCopy(BaseModel):
+    icon: str = "✨"
+    title: str
+    desc: str
+
+class StepCopy(BaseModel):
+    title: str
+    desc: str
+
+class PrototypeCopy(BaseModel):
+    tagline: str
+    subtitle: str = ""
+    features: List[FeatureCopy] = Field(min_length=3)
+    steps: List[StepCopy] = Field(min_length=3)
@@ -0,0 +1,137 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+from collections import Counter, deque
+from typing import Dict, List, Optional
+
+# Event-loop lag monitor: record the loop thread's stack whenever a callback
+# blocks the loop for longer than this. 0 disables the monitor.
+LOOP_LAG_THRESHOLD_MS = float(os.environ.get("LOOP_LAG_THRESHOLD_MS", "250"))
+LOOP_TICK_SECONDS = 0.05
+MAX_LAG_EVENTS = 50
+
+MAX_PROFILE_SECONDS = 60.0
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}.{code.co_qualname}"
+
+
+def _stack(frame) -> List[str]:
+    """Outermost-first function names of a frame's stack."""
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return names[::-1]
+
+
+class SamplingProfiler:
+    """
+    Samples every thread's Python stack from a background thread at a fixed
+    interval and counts identical stacks. The result is in collapsed-stack
+    format ("thread;outer;...;inner count"), which flamegraph.pl, speedscope
+    and most flamegraph viewers load directly.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def _sample(self, seconds: float, interval: float) -> Counter:
+        counts: Counter = Counter()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        me = threading.get_ident()
+        until = time.monotonic() + seconds
+        while time.monotonic() < until:
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                thread = names.get(ident) or f"thread-{ident}"
+                counts[";".join([thread] + _stack(frame))] += 1
+            time.sleep(interval)
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+        return counts
+
+    async def profile(self, seconds: float, interval: float = 0.01) -> str:
+        """Profile the whole process for `seconds`; raises RuntimeError if one is already running."""
+        if not self._lock.acquire(blocking=False):
+            raise RuntimeError("A profile is already being captured")
+        try:
+            counts = await asyncio.to_thread(self._sample, min(seconds, MAX_PROFILE_SECONDS), interval)
+        finally:
+            self._lock.release()
+        return "".join(f"{stack} {n}\n" for stack, n in counts.most_common())
+
+
+class LoopLagMonitor:
+    """
+    A coroutine ticks every LOOP_TICK_SECONDS; a watchdog thread checks the
+    last tick and, when the loop has been stuck longer than the threshold,
+    captures the loop thread's stack while it is still blocked.
+    """
+
+    def __init__(self, threshold_ms: float = LOOP_LAG_THRESHOLD_MS):
+        self.threshold = threshold_ms / 1000
+        self.events: deque = deque(maxlen=MAX_LAG_EVENTS)
+        self.stats = {"stalls": 0, "max_lag_ms": 0.0}
+        self._last_tick = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+
+    async def _tick(self):
+        while True:
+            expected = time.monotonic() + LOOP_TICK_SECONDS
+            self._last_tick = expected
+            await asyncio.sleep(LOOP_TICK_SECONDS)
+            lag = (time.monotonic() - expected) * 1000
+            if lag > self.stats["max_lag_ms"]:
+                self.stats["max_lag_ms"] = round(lag, 1)
+
+    def _watch(self):
+        reported = None  # the stall already captured, keyed by its last tick
+        while not self._stop.wait(LOOP_TICK_SECONDS):
+            last_tick = self._last_tick
+            blocked = time.monotonic() - last_tick
+            if blocked < self.threshold:
+                continue
+            if reported == last_tick:
+                # Same stall, still going: keep its duration current
+                self.events[-1]["blocked_ms"] = round(blocked * 1000, 1)
+                continue
+            reported = last_tick
+            frame = sys._current_frames().get(self._loop_thread)
+            self.stats["stalls"] += 1
+            self.events.append({
+                "at": time.time(),
+                "blocked_ms": round(blocked * 1000, 1),
+                "stack": _stack(frame) if frame else [],
+            })
+            print(f"Event loop blocked for over {blocked * 1000:.0f} ms in {_frame_name(frame) if frame else '?'}")
+
+    def start(self):
+        if self.threshold <= 0 or self._task:
+            return
+        self._loop_thread = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._tick())
+        threading.Thread(target=self._watch, name="loop-lag-monitor", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def snapshot(self) -> Dict:
+        return {"threshold_ms": self.threshold * 1000, **self.stats, "events": list(self.events)}
+
+
+profiler = SamplingProfiler()
+loop_monitor = LoopLagMonitor()
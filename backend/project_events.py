@@ -0,0 +1,26 @@
+import asyncio
+from typing import Dict
+
+
+class ProjectWatchers:
+    """Wakes long-poll requests when a project's version changes."""
+
+    def __init__(self):
+        self._events: Dict[str, asyncio.Event] = {}
+
+    def notify(self, project_id: str):
+        event = self._events.pop(project_id, None)
+        if event:
+            event.set()
+
+    async def wait(self, project_id: str, timeout: float) -> bool:
+        """True if the project changed within `timeout` seconds."""
+        event = self._events.setdefault(project_id, asyncio.Event())
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+project_watchers = ProjectWatchers()
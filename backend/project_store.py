@@ -0,0 +1,183 @@
+import os
+import tempfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .models import ProjectState
+from .response_cache import response_cache
+from .storage import DATA_DIR
+
+# Hot tier limits; least recently used projects beyond these are spilled to disk
+PROJECT_CACHE_ENTRIES = int(os.environ.get("PROJECT_CACHE_ENTRIES", "200"))
+PROJECT_CACHE_MB = float(os.environ.get("PROJECT_CACHE_MB", "32"))
+
+
+class ProjectStore:
+    """
+    Dict-like project store with a bounded in-memory tier. Past the entry or
+    byte limit, least recently used projects are written to <root>/<id>.json
+    and dropped from memory; reading one loads it back. Pinned projects
+    (in-flight runs) are never evicted, so their state objects stay live.
+
+    Runs also checkpoint their project to the same file after each stage and
+    leave a marker under <root>/active/ until they finish, so a restarted
+    process can find and resume them.
+    """
+
+    def __init__(self, root: Path, max_entries: int = PROJECT_CACHE_ENTRIES, max_bytes: int = int(PROJECT_CACHE_MB * 1024 * 1024)):
+        self.root = root
+        self.active_root = root / "active"
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._hot: "OrderedDict[str, ProjectState]" = OrderedDict()
+        self._sizes: Dict[str, Tuple[int, int]] = {}  # id -> (version, encoded bytes)
+        self._pins: Dict[str, int] = {}
+        # Every known id in submission order (ids only; states may be on disk)
+        self._order: Dict[str, None] = {}
+        if self.root.exists():
+            for path in sorted(self.root.glob("*.json"), key=lambda p: p.stat().st_mtime):
+                self._order[path.stem] = None
+        self.stats = {"spills": 0, "reloads": 0, "checkpoints": 0}
+
+    def _path(self, project_id: str) -> Path:
+        return self.root / f"{project_id}.json"
+
+    def __contains__(self, project_id: str) -> bool:
+        return project_id in self._order
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._order))
+
+    def __getitem__(self, project_id: str) -> ProjectState:
+        project = self._hot.get(project_id)
+        if project is not None:
+            self._hot.move_to_end(project_id)
+            return project
+        if project_id not in self._order:
+            raise KeyError(project_id)
+        project = ProjectState.model_validate_json(self._path(project_id).read_bytes())
+        self.stats["reloads"] += 1
+        self._hot[project_id] = project
+        self._evict(keep=project_id)
+        return project
+
+    def get(self, project_id: str, default: Optional[ProjectState] = None) -> Optional[ProjectState]:
+        try:
+            return self[project_id]
+        except (KeyError, FileNotFoundError):
+            return default
+
+    def __setitem__(self, project_id: str, project: ProjectState):
+        self._hot[project_id] = project
+        self._hot.move_to_end(project_id)
+        self._order.setdefault(project_id, None)
+        self._evict(keep=project_id)
+
+    def pin(self, project_id: str):
+        self._pins[project_id] = self._pins.get(project_id, 0) + 1
+
+    def unpin(self, project_id: str):
+        left = self._pins.get(project_id, 0) - 1
+        if left > 0:
+            self._pins[project_id] = left
+        else:
+            self._pins.pop(project_id, None)
+            self._evict()
+
+    def _size(self, project: ProjectState) -> int:
+        cached = self._sizes.get(project.id)
+        if cached and cached[0] == project.version:
+            return cached[1]
+        size = len(response_cache.encode(project))
+        self._sizes[project.id] = (project.version, size)
+        return size
+
+    def _evict(self, keep: Optional[str] = None):
+        total = sum(self._size(p) for p in self._hot.values())
+        for project_id in list(self._hot):
+            if len(self._hot) <= self.max_entries and total <= self.max_bytes:
+                break
+            if project_id == keep or project_id in self._pins:
+                continue
+            total -= self._spill(project_id)
+
+    def _write(self, project: ProjectState) -> bytes:
+        data = response_cache.encode(project)
+        # Write then rename so a crash never leaves a half-written project
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._path(project.id))
+        return data
+
+    def _spill(self, project_id: str) -> int:
+        project = self._hot.pop(project_id)
+        data = self._write(project)
+        response_cache.drop(project_id)
+        self._sizes.pop(project_id, None)
+        self.stats["spills"] += 1
+        return len(data)
+
+    def checkpoint(self, project_id: str):
+        """Write the project to disk now; it stays in memory."""
+        project = self._hot.get(project_id)
+        if project is not None:
+            self._write(project)
+            self.stats["checkpoints"] += 1
+
+    def mark_active(self, project_id: str):
+        self.active_root.mkdir(parents=True, exist_ok=True)
+        (self.active_root / project_id).touch()
+
+    def mark_done(self, project_id: str):
+        (self.active_root / project_id).unlink(missing_ok=True)
+
+    def quarantine(self, project_id: str):
+        """Move a project file that no longer loads to <root>/quarantine/ and forget the project."""
+        self.mark_done(project_id)
+        self._order.pop(project_id, None)
+        self._hot.pop(project_id, None)
+        self._sizes.pop(project_id, None)
+        path = self._path(project_id)
+        if path.exists():
+            (self.root / "quarantine").mkdir(parents=True, exist_ok=True)
+            os.replace(path, self.root / "quarantine" / path.name)
+
+    def active_ids(self) -> List[str]:
+        """Projects whose run had not finished when the process last stopped."""
+        if not self.active_root.exists():
+            return []
+        return [p.name for p in self.active_root.iterdir() if p.name in self._order]
+
+    def iter_json(self) -> Iterator[bytes]:
+        """Encoded projects in submission order; spilled ones are read from disk without being loaded."""
+        for project_id in list(self._order):
+            project = self._hot.get(project_id)
+            if project is None:
+                try:
+                    yield self._path(project_id).read_bytes()
+                    continue
+                except FileNotFoundError:
+                    project = self._hot.get(project_id)  # reloaded meanwhile
+                    if project is None:
+                        continue
+            yield response_cache.encode(project)
+
+    def snapshot(self) -> Dict:
+        return {
+            **self.stats,
+            "projects": len(self._order),
+            "hot": len(self._hot),
+            "hot_bytes": sum(size for _, size in self._sizes.values()),
+            "pinned": len(self._pins),
+        }
+
+
+project_store = ProjectStore(DATA_DIR / "projects")
@@ -0,0 +1,216 @@
+import os
+import json
+import time
+from collections import OrderedDict, deque
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs
+
+# Requests per minute per client; "llm" covers the endpoints that spend LLM quota
+RATE_LIMIT_DEFAULT = float(os.environ.get("RATE_LIMIT_DEFAULT", "120"))
+RATE_LIMIT_LLM = float(os.environ.get("RATE_LIMIT_LLM", "10"))
+# Comma-separated keys that get their own bucket via the X-API-Key header;
+# unknown keys are limited by IP so they can't be used to mint fresh buckets
+RATE_LIMIT_API_KEYS = {k.strip() for k in os.environ.get("RATE_LIMIT_API_KEYS", "").split(",") if k.strip()}
+# Behind Railway/another proxy the client address is in X-Forwarded-For.
+# Only enable when such a proxy is always in front: the header is otherwise
+# client-controlled. The last entry is the one the proxy appended.
+TRUST_PROXY = os.environ.get("TRUST_PROXY", "0") == "1"
+
+# Load shedding: hard cap on concurrent requests, and a latency SLO on time
+# to first byte. While p95 is over the SLO, requests beyond SHED_MIN_INFLIGHT
+# are turned away with 503 until latency recovers. LLM-class requests count
+# towards the cap but not the SLO: their first byte waits on Groq, not on us.
+MAX_INFLIGHT = int(os.environ.get("MAX_INFLIGHT", "64"))
+SHED_P95_MS = float(os.environ.get("SHED_P95_MS", "2000"))
+SHED_MIN_INFLIGHT = int(os.environ.get("SHED_MIN_INFLIGHT", "8"))
+LATENCY_WINDOW_SECONDS = 30.0
+# Smallest burst any bucket gets, so a few requests in a row always pass
+MIN_BURST = 5.0
+
+MAX_CLIENTS = 10_000
+EXEMPT_PATHS = ("/health", "/ready", "/assets/")
+HELD_OPEN_PATHS = ("/admin/profile",)
+
+
+def request_class(method: str, path: str, query: bytes = b"") -> str:
+    if method == "POST" and (path in ("/chat", "/projects") or path.startswith("/prototype/")):
+        # Fast-mode projects never reach the LLM, so they don't spend its quota
+        if path == "/projects" and _last_param(query, "mode") == "fast":
+            return "default"
+        return "llm"
+    return "default"
+
+
+def _last_param(query: bytes, name: str) -> Optional[str]:
+    """Value of a query parameter the way FastAPI reads it: the last one wins."""
+    values = parse_qs(query.decode("latin-1")).get(name)
+    return values[-1] if values else None
+
+
+def _is_long_poll(method: str, path: str, query: bytes) -> bool:
+    """GET /projects/{id} with wait > 0, which is held open until the project changes."""
+    if method != "GET" or not path.startswith("/projects/") or path.count("/") != 2:
+        return False
+    try:
+        return float(_last_param(query, "wait") or 0) > 0
+    except ValueError:
+        return False
+
+
+class TokenBucket:
+    """`rate` tokens per second up to `burst`; each request takes one."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """0 if a token was taken, otherwise seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionControl:
+    """Per-client token buckets plus in-flight count and recent latencies."""
+
+    def __init__(self):
+        self.limits = {"default": RATE_LIMIT_DEFAULT / 60, "llm": RATE_LIMIT_LLM / 60}
+        self.buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+        self.inflight = 0
+        self.latencies: deque = deque(maxlen=2000)
+        self.stats = {"limited": 0, "shed": 0, "admitted": 0}
+
+    def client_key(self, scope) -> str:
+        headers = dict(scope.get("headers") or [])
+        api_key = headers.get(b"x-api-key", b"").decode("latin-1")
+        if api_key in RATE_LIMIT_API_KEYS:
+            return f"key:{api_key}"
+        forwarded = headers.get(b"x-forwarded-for", b"").decode("latin-1")
+        if TRUST_PROXY and forwarded:
+            return f"ip:{forwarded.split(',')[-1].strip()}"
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    def bucket(self, client: str, cls: str) -> TokenBucket:
+        key = (client, cls)
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            rate = self.limits[cls]
+            # Bursts of up to 15 seconds' worth of requests
+            bucket = self.buckets[key] = TokenBucket(rate, max(MIN_BURST, rate * 15))
+            if len(self.buckets) > MAX_CLIENTS:
+                self.buckets.popitem(last=False)
+        self.buckets.move_to_end(key)
+        return bucket
+
+    def charge(self, scope, cls: str) -> float:
+        """
+        Take a token from the client's `cls` bucket; 0 or seconds to wait.
+        The class is recorded on the scope, so handlers that charge "llm"
+        themselves also keep the request out of the latency SLO.
+        """
+        if cls == "llm" or "request_class" not in scope:
+            scope["request_class"] = cls
+        retry_after = self.bucket(self.client_key(scope), cls).take()
+        if retry_after:
+            self.stats["limited"] += 1
+        return retry_after
+
+    def p95_ms(self) -> Optional[float]:
+        cutoff = time.monotonic() - LATENCY_WINDOW_SECONDS
+        recent = sorted(ms for t, ms in self.latencies if t >= cutoff)
+        if len(recent) < 20:
+            return None
+        return recent[int(len(recent) * 0.95) - 1]
+
+    def should_shed(self) -> bool:
+        if self.inflight >= MAX_INFLIGHT:
+            return True
+        if self.inflight < SHED_MIN_INFLIGHT:
+            return False
+        p95 = self.p95_ms()
+        return p95 is not None and p95 > SHED_P95_MS
+
+    def snapshot(self) -> Dict:
+        p95 = self.p95_ms()
+        return {
+            **self.stats,
+            "inflight": self.inflight,
+            "p95_ms": round(p95, 1) if p95 is not None else None,
+            "clients": len(self.buckets),
+        }
+
+
+admission = AdmissionControl()
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware: per-client token buckets for each request class, then
+    concurrency/latency based load shedding. Rejections get 429 or 503 with
+    Retry-After. Health checks and static assets are never limited.
+    """
+
+    def __init__(self, app, control: AdmissionControl = admission):
+        self.app = app
+        self.control = control
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "")
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or path.startswith(EXEMPT_PATHS):
+            return await self.app(scope, receive, send)
+        control = self.control
+
+        retry_after = control.charge(scope, request_class(scope["method"], path, scope.get("query_string", b"")))
+        if retry_after:
+            return await _reject(send, 429, "Rate limit exceeded", retry_after)
+        if control.should_shed():
+            control.stats["shed"] += 1
+            return await _reject(send, 503, "Server busy, retry shortly", 1)
+
+        control.stats["admitted"] += 1
+        # Long-polls and profiler captures are held open on purpose and cost
+        # nothing while waiting; keep them out of the concurrency count and SLO
+        if _is_long_poll(scope["method"], path, scope.get("query_string", b"")) or path.startswith(HELD_OPEN_PATHS):
+            return await self.app(scope, receive, send)
+
+        started = time.monotonic()
+        timed = True
+
+        async def send_timed(message):
+            nonlocal timed
+            if timed and message["type"] == "http.response.start":
+                if scope.get("request_class") != "llm":
+                    now = time.monotonic()
+                    control.latencies.append((now, (now - started) * 1000))
+                timed = False
+            await send(message)
+
+        control.inflight += 1
+        try:
+            await self.app(scope, receive, send_timed)
+        finally:
+            control.inflight -= 1
+
+
+async def _reject(send, status: int, detail: str, retry_after: float):
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, round(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
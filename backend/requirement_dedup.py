@@ -0,0 +1,163 @@
+import os
+from typing import List, Optional, Set, Tuple
+
+from .models import SRS, Requirement, RequirementDedup
+from .similarity import normalize
+
+# Share of the longer requirement's content words that the shorter one must
+# cover for the two to be merged. Above 1 disables merging.
+REQ_DEDUP_THRESHOLD = float(os.environ.get("REQ_DEDUP_THRESHOLD", "0.5"))
+
+# Grammar and filler that says nothing about what a requirement is about.
+# Verbs are kept: they are what tells "create tasks" from "delete tasks".
+_STOPWORDS = {
+    "a", "an", "the", "to", "be", "able", "can", "could", "must", "should", "shall", "will",
+    "of", "for", "with", "and", "or", "their", "its", "is", "are", "that", "this", "via",
+    "using", "on", "as", "by", "from", "into", "at", "between", "each", "all", "any", "own",
+    "i", "we", "they", "them", "it", "system", "app", "application", "feature", "functionality",
+    "support", "provide", "ability", "allow", "allows", "want", "need",
+}
+# "<actor> can/must ..." names who the requirement is for; requirements for
+# different explicit actors are never merged. The neutral ones below don't
+# count, and "user" is never a content word ("Users can log in" / "User login").
+_MODALS = {"can", "could", "must", "should", "shall", "will", "may"}
+_NEUTRAL_ACTORS = {"system", "app", "application", "platform", "it", "we"}
+_SUFFIXES = ("ations", "ation", "ing", "ed", "es", "s")
+_PRIORITY_RANK = {"High": 0, "Medium": 1, "Low": 2}
+
+dedup_stats = {"projects": 0, "removed": 0, "tokens_saved": 0}
+
+
+def _stem(word: str) -> str:
+    for suffix in _SUFFIXES:
+        if len(word) > len(suffix) + 2 and word.endswith(suffix):
+            return word[:-len(suffix)]
+    return word
+
+
+def _parse(text: str) -> Tuple[Optional[str], List[str]]:
+    """The explicit actor, if any, and the stemmed content words."""
+    raw = [w for w in normalize(text).split() if w not in ("a", "an", "the")]
+    actor = None
+    if len(raw) > 1 and raw[1] in _MODALS:
+        actor = _stem(raw[0])
+        raw = raw[2:]
+        if actor in _NEUTRAL_ACTORS:
+            actor = None
+    words = [_stem(w) for w in raw if w not in _STOPWORDS]
+    return actor, [w for w in words if w != "user"]
+
+
+def _same(a: str, b: str) -> bool:
+    """Equal, or the same word with a different ending ("registr" / "regist")."""
+    if a == b:
+        return True
+    short, long = sorted((a, b), key=len)
+    return len(short) >= 4 and len(long) - len(short) <= 3 and long.startswith(short[:-1])
+
+
+def _covered(words: List[str], other: List[str]) -> Set[int]:
+    """Indexes of `words` that also occur in `other`, compounds included ("log in" / "login")."""
+    covered = set()
+    other_pairs = [x + y for x, y in zip(other, other[1:])]
+    for i, word in enumerate(words):
+        if any(_same(word, o) for o in other) or word in other_pairs:
+            covered.add(i)
+        if i + 1 < len(words) and words[i] + words[i + 1] in other:
+            covered.update((i, i + 1))
+    return covered
+
+
+def overlap(a: str, b: str) -> float:
+    """
+    0 unless every content word of one requirement is covered by the other
+    (both adding something of their own, e.g. PDF vs CSV, means two
+    different requirements) and their actors agree; otherwise the covered
+    share of the longer one.
+    """
+    (actor_a, wa), (actor_b, wb) = _parse(a), _parse(b)
+    if not wa or not wb or (actor_a and actor_b and not _same(actor_a, actor_b)):
+        return 0.0
+    ca, cb = _covered(wa, wb), _covered(wb, wa)
+    if len(ca) < len(wa) and len(cb) < len(wb):
+        return 0.0
+    return len(ca) / len(wa) if len(wa) >= len(wb) else len(cb) / len(wb)
+
+
+def covers(a: str, b: str) -> bool:
+    """Every content word of requirement `b` is also in requirement `a`."""
+    (_, wa), (_, wb) = _parse(a), _parse(b)
+    return len(_covered(wb, wa)) == len(wb)
+
+
+def _tokens(text: str) -> int:
+    return len(text) // 4 + 1
+
+
+def dedupe_requirements(
+    srs: Optional[SRS], downstream_prompts: int, threshold: float = REQ_DEDUP_THRESHOLD
+) -> Optional[RequirementDedup]:
+    """
+    Merge near-duplicate requirements in place. Each cluster keeps its
+    broadest requirement, so a narrower one never replaces scope it lacks;
+    the survivor takes the cluster's highest priority and the others'
+    acceptance criteria, and the others move to `srs.duplicates` and are
+    listed in its `merged_from`. `downstream_prompts` is how many later
+    prompts carry the requirement list, for the tokens-saved estimate.
+    """
+    if not srs or len(srs.requirements) < 2 or threshold > 1:
+        return None
+    reqs = srs.requirements
+
+    # Leaders first: most content words, then high priority, then longer descriptions.
+    # A requirement only joins a leader that covers all of it.
+    order = sorted(range(len(reqs)), key=lambda i: (
+        -len(_parse(reqs[i].description)[1]), _PRIORITY_RANK.get(reqs[i].priority, 1), -len(reqs[i].description)
+    ))
+    leader_of = {}
+    leaders: List[int] = []
+    for i in order:
+        scores = {l: overlap(reqs[i].description, reqs[l].description) for l in leaders}
+        matches = [
+            l for l, score in scores.items()
+            if score >= threshold and covers(reqs[l].description, reqs[i].description)
+        ]
+        if matches:
+            leader_of[i] = max(matches, key=scores.get)
+        else:
+            leaders.append(i)
+    if not leader_of:
+        return None
+
+    kept, duplicates = [], []
+    for i, req in enumerate(reqs):
+        if i in leader_of:
+            duplicates.append(req)
+            continue
+        for j in (j for j, l in leader_of.items() if l == i):
+            _absorb(req, reqs[j])
+        kept.append(req)
+
+    saved = sum(_tokens(f"- {r.description} (Priority: {r.priority})\n") for r in duplicates)
+    srs.requirements = kept
+    srs.duplicates = srs.duplicates + duplicates
+    srs.dedup = RequirementDedup(
+        removed=len(duplicates),
+        tokens_saved_per_prompt=saved,
+        estimated_tokens_saved=saved * downstream_prompts,
+    )
+    dedup_stats["projects"] += 1
+    dedup_stats["removed"] += len(duplicates)
+    dedup_stats["tokens_saved"] += srs.dedup.estimated_tokens_saved
+    return srs.dedup
+
+
+def _absorb(leader: Requirement, duplicate: Requirement):
+    seen = {normalize(c) for c in leader.acceptance_criteria}
+    for criterion in duplicate.acceptance_criteria:
+        if normalize(criterion) not in seen:
+            seen.add(normalize(criterion))
+            leader.acceptance_criteria.append(criterion)
+    if _PRIORITY_RANK.get(duplicate.priority, 1) < _PRIORITY_RANK.get(leader.priority, 1):
+        leader.priority = duplicate.priority
+    leader.merged_from.append(duplicate.id)
@@ -0,0 +1,30 @@
+from typing import Dict, Tuple
+
+from .models import ProjectState
+
+
+class ProjectResponseCache:
+    """
+    Pre-encoded JSON per project, keyed by ProjectState.version. Polls of an
+    unchanged project return the cached bytes without re-validating or
+    re-serializing the model.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[int, bytes]] = {}
+
+    def encode(self, project: ProjectState) -> bytes:
+        entry = self._entries.get(project.id)
+        if entry and entry[0] == project.version:
+            return entry[1]
+        # pydantic-core serializes straight to JSON bytes (model_dump_json
+        # would build a str first and .encode() would copy it)
+        data = ProjectState.__pydantic_serializer__.to_json(project)
+        self._entries[project.id] = (project.version, data)
+        return data
+
+    def drop(self, project_id: str):
+        self._entries.pop(project_id, None)
+
+
+response_cache = ProjectResponseCache()
@@ -0,0 +1,46 @@
+import re
+import zlib
+import numpy as np
+from typing import List, Set
+
+# Width of the hashed n-gram vectors
+VECTOR_DIM = 1024
+
+_non_word = re.compile(r"[^a-z0-9 ]+")
+_spaces = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    text = text.lower().replace("'s", " is").replace("n't", " not")
+    text = _non_word.sub(" ", text)
+    return _spaces.sub(" ", text).strip()
+
+
+def ngrams(text: str, n: int = 3) -> Set[str]:
+    """Character n-grams of the normalized text plus its words."""
+    norm = normalize(text)
+    padded = f" {norm} "
+    grams = {padded[i:i + n] for i in range(max(len(padded) - n + 1, 1))}
+    grams.update(f"w:{w}" for w in norm.split())
+    return grams
+
+
+def _bucket(gram: str) -> int:
+    # crc32 is stable across processes, unlike hash()
+    return zlib.crc32(gram.encode()) % VECTOR_DIM
+
+
+def hashed_vector(text: str) -> np.ndarray:
+    """L2-normalised bag of hashed n-grams; cosine similarity is a dot product."""
+    vec = np.zeros(VECTOR_DIM, dtype=np.float32)
+    for gram in ngrams(text):
+        vec[_bucket(gram)] += 1.0
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+def hashed_matrix(texts: List[str]) -> np.ndarray:
+    """Stack hashed_vector() rows for a batch of texts."""
+    if not texts:
+        return np.zeros((0, VECTOR_DIM), dtype=np.float32)
+    return np.vstack([hashed_vector(t) for t in texts])
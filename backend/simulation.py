@@ -0,0 +1,140 @@
+import numpy as np
+from typing import List, Optional, Tuple
+
+from .models import ProjectPlan, WBSTask, RiskEstimate
+
+# Default spread when a task only has a point estimate
+OPTIMISTIC_FACTOR = 0.75
+PESSIMISTIC_FACTOR = 1.75
+
+DEFAULT_ITERATIONS = 10_000
+# Samples are drawn in batches so 100k+ iterations over large plans
+# don't materialise one giant (tasks x iterations) matrix.
+CHUNK_SIZE = 25_000
+QUANTILE_STEPS = 2048
+
+
+def _three_point(task: WBSTask) -> Tuple[float, float, float]:
+    likely = max(task.estimated_days, 0.0)
+    low = task.optimistic_days if task.optimistic_days is not None else likely * OPTIMISTIC_FACTOR
+    high = task.pessimistic_days if task.pessimistic_days is not None else likely * PESSIMISTIC_FACTOR
+    low = min(max(low, 0.0), likely)
+    high = max(high, likely)
+    return low, likely, high
+
+
+def _dependency_order(tasks: List[WBSTask]) -> Tuple[List[int], List[np.ndarray]]:
+    """
+    Topologically order tasks. Dependencies may reference a task id or a
+    task name (the LLM planner returns names). Unknown references are
+    ignored, and edges that would close a cycle are dropped.
+    """
+    lookup = {}
+    for i, t in enumerate(tasks):
+        lookup.setdefault(t.id, i)
+        lookup.setdefault(t.name, i)
+
+    parents = []
+    for i, t in enumerate(tasks):
+        deps = {lookup[d] for d in t.dependencies if d in lookup and lookup[d] != i}
+        parents.append(deps)
+
+    order, placed = [], set()
+    pending = list(range(len(tasks)))
+    while pending:
+        ready = [i for i in pending if parents[i] <= placed]
+        if not ready:
+            # Cycle: break it at the first pending task
+            ready = [pending[0]]
+            parents[ready[0]] &= placed
+        for i in ready:
+            order.append(i)
+            placed.add(i)
+        pending = [i for i in pending if i not in placed]
+
+    return order, [np.fromiter(sorted(p), dtype=np.intp) for p in parents]
+
+
+def _pert_quantiles(low: np.ndarray, mode: np.ndarray, high: np.ndarray) -> np.ndarray:
+    """
+    Per-task inverse CDF of the PERT distribution, tabulated at
+    QUANTILE_STEPS evenly spaced probabilities. Sampling then becomes a
+    single gather of uniform integer draws, which is several times faster
+    than numpy's Beta sampler at 100k+ iterations.
+    """
+    width = high - low
+    safe = np.where(width > 0, width, 1.0)
+    alpha = np.where(width > 0, 1 + 4 * (mode - low) / safe, 1.0)
+    beta = np.where(width > 0, 1 + 4 * (high - mode) / safe, 1.0)
+
+    edges = np.linspace(0.0, 1.0, QUANTILE_STEPS + 1)
+    mid = (edges[:-1] + edges[1:]) / 2
+    log_pdf = (alpha[:, None] - 1) * np.log(mid) + (beta[:, None] - 1) * np.log1p(-mid)
+    pdf = np.exp(log_pdf - log_pdf.max(axis=1, keepdims=True))
+    cdf = np.zeros((len(low), QUANTILE_STEPS + 1))
+    np.cumsum(pdf, axis=1, out=cdf[:, 1:])
+    cdf /= cdf[:, -1:]
+
+    probs = (np.arange(QUANTILE_STEPS) + 0.5) / QUANTILE_STEPS
+    table = np.empty((len(low), QUANTILE_STEPS), dtype=np.float32)
+    for i in range(len(low)):
+        table[i] = low[i] + np.interp(probs, cdf[i], edges) * width[i]
+    return table
+
+
+def simulate_plan(plan: ProjectPlan, iterations: int = DEFAULT_ITERATIONS,
+                  seed: Optional[int] = None) -> RiskEstimate:
+    """
+    Monte Carlo schedule and cost risk for a plan.
+
+    Duration is the critical path through the dependency graph; cost is the
+    sampled effort of every task times its daily rate.
+    """
+    tasks = plan.tasks
+    if not tasks or iterations < 1:
+        return RiskEstimate(
+            iterations=max(iterations, 0),
+            duration_p50=plan.total_estimated_days, duration_p80=plan.total_estimated_days,
+            duration_p95=plan.total_estimated_days,
+            cost_p50=plan.estimated_cost, cost_p80=plan.estimated_cost, cost_p95=plan.estimated_cost,
+        )
+
+    points = np.array([_three_point(t) for t in tasks], dtype=np.float64)
+    low, mode, high = points[:, 0], points[:, 1], points[:, 2]
+
+    total_days = mode.sum()
+    fallback_rate = plan.estimated_cost / total_days if total_days > 0 else 0.0
+    rates = np.array([t.daily_rate if t.daily_rate is not None else fallback_rate for t in tasks],
+                     dtype=np.float32)
+
+    order, parents = _dependency_order(tasks)
+    table = _pert_quantiles(low, mode, high).ravel()
+    offsets = (np.arange(len(tasks), dtype=np.int32) * QUANTILE_STEPS)[:, None]
+    rng = np.random.default_rng(seed)
+
+    durations = np.empty(iterations)
+    costs = np.empty(iterations)
+    for start in range(0, iterations, CHUNK_SIZE):
+        n = min(CHUNK_SIZE, iterations - start)
+        draws = rng.integers(0, QUANTILE_STEPS, size=(len(tasks), n), dtype=np.int32)
+        samples = np.take(table, draws + offsets)
+
+        finish = np.empty_like(samples)
+        for i in order:
+            deps = parents[i]
+            if deps.size:
+                np.add(samples[i], finish[deps].max(axis=0), out=finish[i])
+            else:
+                finish[i] = samples[i]
+
+        durations[start:start + n] = finish.max(axis=0)
+        costs[start:start + n] = rates @ samples
+
+    d50, d80, d95 = np.percentile(durations, [50, 80, 95])
+    c50, c80, c95 = np.percentile(costs, [50, 80, 95])
+    return RiskEstimate(
+        iterations=iterations,
+        duration_p50=round(float(d50), 1), duration_p80=round(float(d80), 1),
+        duration_p95=round(float(d95), 1),
+        cost_p50=round(float(c50), 2), cost_p80=round(float(c80), 2), cost_p95=round(float(c95), 2),
+    )
@@ -0,0 +1,50 @@
+import os
+import hashlib
+import tempfile
+from pathlib import Path
+from typing import Dict, Union
+
+from .models import FileRef
+
+# Root for everything the backend keeps on local disk
+DATA_DIR = Path(os.environ.get("AUTOSDLC_DATA_DIR", Path(__file__).parent.parent / ".data"))
+
+
+class BlobStore:
+    """
+    Content-addressed file store: blobs live at <root>/<sha256[:2]>/<sha256[2:]>,
+    so identical generated files are stored once.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def path_for(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:]
+
+    def put(self, content: Union[str, bytes]) -> FileRef:
+        data = content.encode("utf-8") if isinstance(content, str) else content
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path_for(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write then rename so readers never see a partial blob
+            fd, tmp = tempfile.mkstemp(dir=path.parent)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        return FileRef(digest=digest, size=len(data))
+
+    def read(self, digest: str) -> bytes:
+        return self.path_for(digest).read_bytes()
+
+    def exists(self, digest: str) -> bool:
+        return self.path_for(digest).exists()
+
+
+blob_store = BlobStore(DATA_DIR / "blobs")
+
+
+def store_files(contents: Dict[str, str]) -> Dict[str, FileRef]:
+    """Write generated file contents to the blob store; returns path -> reference."""
+    return {path: blob_store.put(content) for path, content in contents.items()}
@@ -0,0 +1,29 @@
+import pytest
+
+from backend.chat_cache import ProjectAnswerCache
+
+
+@pytest.mark.parametrize("stored,asked", [
+    ("explain requirement REQ-001 in detail", "explain requirement REQ-002 in detail"),
+    ("What are the acceptance criteria for REQ-003?", "What are the acceptance criteria for REQ-005?"),
+    ("Can you explain what TASK-001 involves and who should own it?",
+     "Can you explain what TASK-002 involves and who should own it?"),
+    ("What happens if we cut the timeline to 10 days?", "What happens if we cut the timeline to 15 days?"),
+])
+def test_different_ids_or_numbers_never_hit(stored, asked):
+    cache = ProjectAnswerCache()
+    cache.store(stored, "answer", "fp")
+    assert cache.lookup(asked, "fp") is None
+
+
+def test_rephrased_question_hits():
+    cache = ProjectAnswerCache()
+    cache.store("What are the acceptance criteria for REQ-003?", "answer", "fp")
+    assert cache.lookup("what are the acceptance criteria for req-003", "fp") == "answer"
+
+
+def test_new_context_clears():
+    cache = ProjectAnswerCache()
+    cache.store("How long will the project take?", "answer", "fp")
+    assert cache.lookup("How long will the project take?", "fp") == "answer"
+    assert cache.lookup("How long will the project take?", "other") is None
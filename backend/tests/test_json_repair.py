@@ -0,0 +1,48 @@
+import pytest
+
+from backend.json_repair import repair_json
+
+
+@pytest.mark.parametrize("text,expected", [
+    ('{"a": 1}', {"a": 1}),
+    ('Sure! Here it is:\n```json\n{"a": [1, 2]}\n```\nAnything else?', {"a": [1, 2]}),
+    ('{"a": 1, "b": [1, 2,],}', {"a": 1, "b": [1, 2]}),
+    ("{'a': 'it\\'s', 'b': True, 'c': None, 'd': False}", {"a": "it's", "b": True, "c": None, "d": False}),
+    ("{'a': 'say \"hi\"'}", {"a": 'say "hi"'}),
+    ('{"a": "line one\nline two\tend"}', {"a": "line one\nline two\tend"}),
+    ('{"a": [1, 2}', {"a": [1, 2]}),
+    ('{"a": 1} {"b": 2}', {"a": 1}),
+    ('[{"x": 1}, {"x": 2}]', [{"x": 1}, {"x": 2}]),
+])
+def test_damaged_documents(text, expected):
+    assert repair_json(text) == expected
+
+
+@pytest.mark.parametrize("text,expected", [
+    # Open brackets are closed
+    ('{"a": [1, 2', {"a": [1, 2]}),
+    ('{"a": {"b": true', {"a": {"b": True}}),
+    # Cut off inside a string: the half-written value is dropped, not kept
+    ('{"a": 1, "b": "tru', {"a": 1}),
+    ('{"b": "tru', {}),
+    ('["a", "b", "unfin', ["a", "b"]),
+    ('{"items": [{"d": "complete"}, {"d": "half a sent', {"items": [{"d": "complete"}]}),
+    ('{"a": 1, "b', {"a": 1}),
+    ('{"a": 1, "b": {"c": "tru', {"a": 1}),
+    # Cut off after a key or comma
+    ('{"a": 1, "b":', {"a": 1}),
+    ('{"a": [1, 2,', {"a": [1, 2]}),
+])
+def test_truncated_documents(text, expected):
+    assert repair_json(text) == expected
+
+
+def test_truncated_nested_element_keeps_earlier_siblings():
+    text = '{"requirements": [{"description": "Login", "priority": "High"}, {"description": "Export rep'
+    assert repair_json(text) == {"requirements": [{"description": "Login", "priority": "High"}]}
+
+
+@pytest.mark.parametrize("text", ["", "no json here", "```\n```"])
+def test_nothing_usable(text):
+    with pytest.raises(ValueError):
+        repair_json(text)
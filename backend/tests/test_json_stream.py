@@ -0,0 +1,58 @@
+import json
+
+from backend.json_stream import JSONItemStream
+
+
+def feed_chars(parser, text):
+    """Feed one character at a time; returns (position, item) for every emitted element."""
+    emitted = []
+    for i, c in enumerate(text):
+        emitted.extend((i, item) for item in parser.feed(c))
+    return emitted
+
+
+def test_items_emitted_as_soon_as_complete():
+    text = '{"requirements": [{"description": "a"}, {"description": "b"}], "note": "x"}'
+    emitted = feed_chars(JSONItemStream("requirements"), text)
+    assert [item for _, item in emitted] == [{"description": "a"}, {"description": "b"}]
+    # The first element comes out at its closing brace, not at the end of the document
+    assert emitted[0][0] == text.index("}")
+
+
+def test_strings_containing_json_syntax():
+    items = [{"d": 'has , and ] and } and \\" quote'}, "plain, string", {"nested": [1, {"x": "]"}]}]
+    text = json.dumps({"items": items})
+    parser = JSONItemStream("items")
+    assert [item for _, item in feed_chars(parser, text)] == items
+    assert parser.document() == {"items": items}
+
+
+def test_only_the_target_key_is_streamed():
+    text = '{"other": [1, 2], "meta": {"items": [9]}, "items": [3, 4]}'
+    assert [item for _, item in feed_chars(JSONItemStream("items"), text)] == [3, 4]
+
+
+def test_top_level_array_and_scalars():
+    text = '```json\n[1, true, null, "s", 2.5]\n```'
+    assert [item for _, item in feed_chars(JSONItemStream(), text)] == [1, True, None, "s", 2.5]
+
+
+def test_malformed_element_is_skipped():
+    text = '{"items": [{"a": 1}, {"b": oops}, {"c": 3}]}'
+    assert [item for _, item in feed_chars(JSONItemStream("items"), text)] == [{"a": 1}, {"c": 3}]
+
+
+def test_chunk_boundaries_do_not_matter():
+    text = json.dumps({"files": [f"src/f{i}.py" for i in range(20)]})
+    whole = JSONItemStream("files").feed(text)
+    chunked = JSONItemStream("files")
+    pieces = []
+    for i in range(0, len(text), 7):
+        pieces.extend(chunked.feed(text[i:i + 7]))
+    assert pieces == whole == [f"src/f{i}.py" for i in range(20)]
+
+
+def test_truncated_stream_keeps_complete_items():
+    parser = JSONItemStream("items")
+    assert parser.feed('{"items": [{"a": 1}, {"b": 2}, {"c": "unfinish') == [{"a": 1}, {"b": 2}]
+    assert parser.items == [{"a": 1}, {"b": 2}]
@@ -0,0 +1,108 @@
+import pytest
+
+from backend.models import SRS, Requirement
+from backend.requirement_dedup import REQ_DEDUP_THRESHOLD, dedupe_requirements, overlap
+
+DUPLICATES = [
+    ("User login", "Users can log in securely"),
+    ("Users can create, edit and delete tasks", "Users can create, edit, and delete tasks."),
+    ("Users can reset their password", "Password reset via email"),
+    ("The system must send email notifications", "Send notifications to users by email"),
+    ("Users can search for products", "Product search functionality"),
+    ("Users can upload profile pictures", "Profile picture upload"),
+    ("Support dark mode", "Dark mode theme support"),
+    ("Users can filter tasks by status", "Filter tasks by their status"),
+    ("Export reports to PDF", "Users can export reports as PDF files"),
+    ("Real-time chat between users", "Users can chat with each other in real time"),
+    ("Users can log out", "Logout functionality"),
+    ("Users can comment on posts", "Commenting on posts"),
+    ("Responsive design for mobile devices", "The UI must be responsive on mobile devices"),
+    ("Users can book appointments", "Appointment booking"),
+]
+
+DISTINCT = [
+    ("Export reports to PDF", "Export reports to CSV"),
+    ("Users can create tasks", "Users can delete tasks"),
+    ("Users can log in", "Users can log out"),
+    ("Admins can view reports", "Users can view reports"),
+    ("Users can upload images", "Users can upload videos"),
+    ("Send email notifications", "Send SMS notifications"),
+    ("Users can add items to cart", "Users can remove items from cart"),
+    ("Users can follow other users", "Users can block other users"),
+    ("Search products by name", "Search products by category"),
+    ("Users can like posts", "Users can share posts"),
+    ("Users can reset their password", "Users can change their email address"),
+    ("Dark mode support", "Offline mode support"),
+    ("Users can book appointments", "Users can cancel appointments"),
+    ("Display weekly sales report", "Display monthly sales report"),
+    ("Users can create projects", "Users can create tasks"),
+    ("Login with Google", "Login with GitHub"),
+    ("Pay with credit card", "Pay with PayPal"),
+    ("Users can edit their profile", "Users can view profiles of other users"),
+    ("Track order status", "Track delivery driver location"),
+    ("Import contacts from CSV", "Export contacts to CSV"),
+    ("Users can log in", "Users can log in with Google and receive a welcome email"),
+]
+
+
+@pytest.mark.parametrize("a,b", DUPLICATES)
+def test_duplicates_reach_threshold(a, b):
+    assert overlap(a, b) >= REQ_DEDUP_THRESHOLD
+    assert overlap(b, a) == overlap(a, b)
+
+
+@pytest.mark.parametrize("a,b", DISTINCT)
+def test_distinct_requirements_stay_apart(a, b):
+    assert overlap(a, b) < REQ_DEDUP_THRESHOLD
+
+
+def _srs(*items):
+    return SRS(project_id="p", requirements=[
+        Requirement(id=f"REQ-{i + 1:03d}", description=d, priority=p, acceptance_criteria=[f"c{i + 1}"])
+        for i, (d, p) in enumerate(items)
+    ])
+
+
+def test_merge_keeps_traceability_and_criteria():
+    srs = _srs(
+        ("User login", "Medium"),
+        ("Users can log in securely", "High"),
+        ("Export reports to PDF", "Medium"),
+        ("Export reports to CSV", "Medium"),
+    )
+    dedup = dedupe_requirements(srs, downstream_prompts=10)
+
+    assert [r.id for r in srs.requirements] == ["REQ-002", "REQ-003", "REQ-004"]
+    assert [r.id for r in srs.duplicates] == ["REQ-001"]
+    survivor = srs.requirements[0]
+    assert survivor.merged_from == ["REQ-001"]
+    assert survivor.acceptance_criteria == ["c2", "c1"]
+    assert dedup.removed == 1
+    assert dedup.estimated_tokens_saved == dedup.tokens_saved_per_prompt * 10 > 0
+
+
+def test_nothing_to_merge():
+    srs = _srs(("Users can create tasks", "High"), ("Users can delete tasks", "High"))
+    assert dedupe_requirements(srs, downstream_prompts=10) is None
+    assert len(srs.requirements) == 2 and srs.dedup is None
+
+
+def test_threshold_above_one_disables():
+    srs = _srs(("User login", "High"), ("User login", "High"))
+    assert dedupe_requirements(srs, downstream_prompts=10, threshold=1.01) is None
+
+
+@pytest.mark.parametrize("narrow,broad", [
+    ("Users can view their orders", "Users can view and cancel their orders"),
+    ("Send email notifications", "Send email notifications and SMS alerts"),
+    ("Admin dashboard", "Admin dashboard with sales analytics"),
+])
+def test_narrower_requirement_never_replaces_broader(narrow, broad):
+    srs = _srs((narrow, "High"), (broad, "Medium"))
+    dedupe_requirements(srs, downstream_prompts=10)
+
+    assert [r.description for r in srs.requirements] == [broad]
+    survivor = srs.requirements[0]
+    assert survivor.priority == "High"
+    assert survivor.merged_from == ["REQ-001"]
+    assert [r.description for r in srs.duplicates] == [narrow]
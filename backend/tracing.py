@@ -0,0 +1,142 @@
+import os
+import json
+import time
+import asyncio
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Dict, List, Optional
+
+# Directory to append finished project traces to as JSONL (one span per line)
+TRACE_EXPORT_DIR = os.environ.get("TRACE_EXPORT_DIR", "")
+MAX_TRACES = 200
+MAX_EVENTS_PER_TRACE = 5000
+
+
+class Trace:
+    """
+    Spans of one project, as Chrome trace events ("X" complete events and
+    "i" instants). Each asyncio task gets its own row, so concurrent
+    stages and LLM calls show up side by side in the viewer.
+    """
+
+    def __init__(self, project_id: str):
+        self.project_id = project_id
+        self.started = time.perf_counter()
+        self.events: List[Dict[str, Any]] = []
+        self.dropped = 0
+        self._rows: "weakref.WeakKeyDictionary[asyncio.Task, int]" = weakref.WeakKeyDictionary()
+        self._row_names: Dict[int, str] = {}
+
+    def _now_us(self) -> float:
+        return round((time.perf_counter() - self.started) * 1e6, 1)
+
+    def _row(self, label: str) -> int:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        if task is None:
+            return 0
+        row = self._rows.get(task)
+        if row is None:
+            row = self._rows[task] = len(self._row_names) + 1
+            self._row_names[row] = label
+        return row
+
+    def _add(self, event: Dict[str, Any]):
+        if len(self.events) >= MAX_EVENTS_PER_TRACE:
+            self.dropped += 1
+            return
+        self.events.append(event)
+
+    def instant(self, name: str, cat: str, **args):
+        self._add({"name": name, "cat": cat, "ph": "i", "s": "t", "ts": self._now_us(),
+                   "pid": 1, "tid": self._row(name), "args": args})
+
+    def chrome(self) -> Dict[str, Any]:
+        """Trace Event Format document (chrome://tracing, Perfetto, speedscope)."""
+        meta = [{"name": "process_name", "ph": "M", "pid": 1, "tid": 0, "args": {"name": f"project {self.project_id}"}}]
+        meta += [
+            {"name": "thread_name", "ph": "M", "pid": 1, "tid": row, "args": {"name": label}}
+            for row, label in self._row_names.items()
+        ]
+        return {
+            "traceEvents": meta + self.events,
+            "displayTimeUnit": "ms",
+            "otherData": {"project_id": self.project_id, "dropped_events": self.dropped},
+        }
+
+    def export_jsonl(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"{self.project_id}.jsonl"), "a") as f:
+            for event in self.events:
+                f.write(json.dumps({"project_id": self.project_id, **event}) + "\n")
+
+
+_traces: "OrderedDict[str, Trace]" = OrderedDict()
+
+# Trace the current task records into; copied into child tasks like the deadline
+_current: ContextVar[Optional[Trace]] = ContextVar("project_trace", default=None)
+
+
+def start_trace(project_id: str) -> Token:
+    """Begin a fresh trace for a project run and make it current."""
+    trace = _traces[project_id] = Trace(project_id)
+    _traces.move_to_end(project_id)
+    if len(_traces) > MAX_TRACES:
+        _traces.popitem(last=False)
+    return _current.set(trace)
+
+
+def use_trace(project_id: Optional[str]) -> Optional[Token]:
+    """Record into an existing project trace (e.g. chat about that project)."""
+    trace = _traces.get(project_id) if project_id else None
+    return _current.set(trace) if trace else None
+
+
+def end_trace(token: Optional[Token], export: bool = False):
+    if token is None:
+        return
+    trace = _current.get()
+    _current.reset(token)
+    if export and trace and TRACE_EXPORT_DIR:
+        try:
+            trace.export_jsonl(TRACE_EXPORT_DIR)
+        except OSError as e:
+            print(f"Trace export failed: {e}")
+
+
+def get_trace(project_id: str) -> Optional[Trace]:
+    return _traces.get(project_id)
+
+
+@contextmanager
+def span(name: str, cat: str, **args):
+    """
+    Time the enclosed block as a span of the current project trace. Yields
+    the span's args dict so the block can attach results (model, outcome...).
+    A no-op outside a traced run.
+    """
+    trace = _current.get()
+    if trace is None:
+        yield args
+        return
+    row = trace._row(name)
+    start = trace._now_us()
+    try:
+        yield args
+    except BaseException as e:
+        args.setdefault("error", repr(e))
+        raise
+    finally:
+        trace._add({"name": name, "cat": cat, "ph": "X", "ts": start, "dur": round(trace._now_us() - start, 1),
+                    "pid": 1, "tid": row, "args": args})
+
+
+def instant(name: str, cat: str, **args):
+    """Point event (fallbacks, cache hits) on the current project trace."""
+    trace = _current.get()
+    if trace is not None:
+        trace.instant(name, cat, **args)
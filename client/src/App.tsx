@@ -3,7 +3,7 @@ import {
     FileText, CheckCircle, Activity, Code, Brain, Send,
     MessageCircle, FolderTree, LayoutDashboard, Users, Cpu,
     GitBranch, Zap, Rocket, Terminal, Database,
-    Layers, ChevronRight, Eye, ArrowLeft, Loader2, Globe
+    Layers, ChevronRight, Eye, ArrowLeft, Globe
 } from 'lucide-react'
 import { ProjectBrief, ProjectState } from './types'
 
@@ -32,15 +32,16 @@ function App() {
         { role: 'assistant', content: '👋 Hi! I\'m your **AutoSDLC Assistant**. Submit a project brief and ask me anything about your project plan, architecture, or costs.' }
     ]);
     const [chatLoading, setChatLoading] = useState(false);
+    const [chatSession, setChatSession] = useState<string | null>(null);
     const chatRef = useRef<HTMLDivElement>(null);
-    const [codeTab, setCodeTab] = useState(0);
+    const [codeTab, setCodeTab] = useState<string | null>(null);  // selected file path
+    const [fileContents, setFileContents] = useState<Record<string, string>>({});
     const [activeSection, setActiveSection] = useState<string | null>(null);
 
     // Prototype state
-    const [protoLoading, setProtoLoading] = useState(false);
     const [protoReady, setProtoReady] = useState(false);
     const [protoView, setProtoView] = useState(false);
-    const [protoHtml, setProtoHtml] = useState('');
+    const [protoUrl, setProtoUrl] = useState('');
 
     const submit = async () => {
         if (!brief) return;
@@ -56,21 +57,18 @@ function App() {
         finally { setLoading(false); }
     };
 
-    const generatePrototype = async () => {
+    const generatePrototype = () => {
         if (!project) return;
-        setProtoLoading(true);
-        try {
-            const res = await fetch(`${API}/prototype/${project.id}`, { method: 'POST' });
-            if (!res.ok) throw new Error('Failed to generate prototype');
-            const data = await res.json();
-            setProtoHtml(data.html);
-            setProtoReady(true);
-            setProtoView(true);
-        } catch (e) {
-            setError(e instanceof Error ? e.message : 'Prototype generation failed');
-        } finally {
-            setProtoLoading(false);
-        }
+        // Streamed HTML: the iframe paints the page shell while the copy is still being written
+        setProtoUrl(`${API}/prototype/${project.id}/html`);
+        setProtoReady(true);
+        setProtoView(true);
+    };
+
+    const cancelRun = async () => {
+        if (!project) return;
+        const res = await fetch(`${API}/projects/${project.id}/cancel`, { method: 'POST' });
+        if (res.ok) setProject(await res.json());
     };
 
     const sendChat = async () => {
@@ -82,23 +80,42 @@ function App() {
         try {
             const res = await fetch(`${API}/chat`, {
                 method: 'POST', headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ message: msg, project_id: project?.id })
+                body: JSON.stringify({ message: msg, project_id: project?.id, session_id: chatSession })
             });
             const data = await res.json();
+            if (data.session_id) setChatSession(data.session_id);
             setMessages(p => [...p, { role: 'assistant', content: data.reply }]);
         } catch { setMessages(p => [...p, { role: 'assistant', content: 'Connection error.' }]); }
         finally { setChatLoading(false); }
     };
 
+    // Sessions are per project on the server; start a new one when the project changes
+    useEffect(() => { setChatSession(null); }, [project?.id]);
+
     useEffect(() => {
         if (!project) return;
-        const i = setInterval(async () => {
-            try {
-                const res = await fetch(`${API}/projects/${project.id}`);
-                if (res.ok) setProject(await res.json());
-            } catch { }
-        }, 2000);
-        return () => clearInterval(i);
+        // Long-poll: the server holds the request until the project version changes
+        let active = true;
+        let etag = '';
+        (async () => {
+            while (active) {
+                try {
+                    const res = await fetch(`${API}/projects/${project.id}?wait=25`, {
+                        headers: etag ? { 'If-None-Match': etag } : {}
+                    });
+                    if (res.status === 200) {
+                        etag = res.headers.get('ETag') || '';
+                        const next = await res.json();
+                        if (active) setProject(next);
+                    } else if (res.status !== 304) {
+                        await new Promise(r => setTimeout(r, 2000));
+                    }
+                } catch {
+                    await new Promise(r => setTimeout(r, 2000));
+                }
+            }
+        })();
+        return () => { active = false; };
     }, [project?.id]);
 
     useEffect(() => { chatRef.current?.scrollIntoView({ behavior: 'smooth' }); }, [messages]);
@@ -107,7 +124,30 @@ function App() {
     const tasks = project?.plan?.tasks || [];
     const cost = project?.plan?.estimated_cost || 0;
     const days = project?.plan?.total_estimated_days || 0;
-    const codeFiles = project?.artifacts ? Object.keys(project.artifacts.code_snippets) : [];
+    const generatedFiles = project?.artifacts ? Object.keys(project.artifacts.files) : [];
+    // Generated files first; the rest of the structure is written on first view
+    const codeFiles = project?.artifacts
+        ? [...generatedFiles, ...project.artifacts.file_structure.filter(f => !(f in project.artifacts!.files))]
+        : [];
+    // By path: files move between the two groups as they are generated
+    const activeFile = codeTab && codeFiles.includes(codeTab) ? codeTab : codeFiles[0];
+    const activeDigest = activeFile ? project?.artifacts?.files[activeFile]?.digest : undefined;
+
+    // File contents live in the backend blob store; fetch each one on first view
+    useEffect(() => {
+        if (!project || !activeFile || (activeDigest && fileContents[activeDigest] !== undefined)) return;
+        const path = activeFile.split('/').map(encodeURIComponent).join('/');
+        fetch(`${API}/projects/${project.id}/files/${path}`)
+            .then(res => res.ok ? res : Promise.reject())
+            .then(async res => {
+                // Placeholders (no LLM available) come without an ETag and are kept by path
+                const digest = activeDigest ?? res.headers.get('ETag')?.replace(/"/g, '');
+                const text = await res.text();
+                setFileContents(p => ({ ...p, [digest ?? `path:${activeFile}`]: text }));
+            })
+            .catch(() => { });
+    }, [project?.id, activeFile, activeDigest]);
+    const activeContent = activeDigest ? fileContents[activeDigest] ?? 'Loading…' : fileContents[`path:${activeFile}`] ?? 'Generating…';
 
     const getPhaseStatus = (key: string) => {
         if (!project) return 'idle';
@@ -121,18 +161,14 @@ function App() {
     };
 
     // ============ PROTOTYPE FULLSCREEN VIEW ============
-    if (protoView && protoHtml) {
-        // Create blob URL for reliable iframe rendering
-        const blob = new Blob([protoHtml], { type: 'text/html; charset=utf-8' });
-        const blobUrl = URL.createObjectURL(blob);
-
+    if (protoView && protoUrl) {
         return (
             <div className="h-screen flex flex-col bg-slate-950">
                 {/* Toolbar */}
                 <div className="flex items-center justify-between px-5 py-3 bg-slate-900/80 border-b border-white/5 backdrop-blur-xl">
                     <div className="flex items-center gap-3">
                         <button
-                            onClick={() => { URL.revokeObjectURL(blobUrl); setProtoView(false); }}
+                            onClick={() => setProtoView(false)}
                             className="flex items-center gap-2 text-sm text-slate-400 hover:text-white transition-colors px-3 py-1.5 rounded-lg hover:bg-white/5"
                         >
                             <ArrowLeft className="w-4 h-4" /> Back to Dashboard
@@ -144,7 +180,7 @@ function App() {
                             <span className="text-xs font-semibold text-emerald-300">Live Prototype</span>
                         </div>
                         <button
-                            onClick={() => { const w = window.open(); if (w) { w.document.write(protoHtml); w.document.close(); } }}
+                            onClick={() => window.open(protoUrl, '_blank')}
                             className="flex items-center gap-2 px-3 py-1.5 bg-violet-500/10 rounded-lg border border-violet-500/20 hover:bg-violet-500/20 transition-colors cursor-pointer"
                         >
                             <Eye className="w-3.5 h-3.5 text-violet-400" />
@@ -154,7 +190,7 @@ function App() {
                 </div>
                 {/* Live Preview Iframe */}
                 <iframe
-                    src={blobUrl}
+                    src={protoUrl}
                     className="flex-1 w-full border-0"
                     title="Website Prototype"
                     style={{ minHeight: 0 }}
@@ -212,6 +248,11 @@ function App() {
                     <div className="flex items-center gap-2 mb-3 px-2">
                         <GitBranch className="w-4 h-4 text-violet-400" />
                         <span className="text-xs font-semibold text-slate-400 uppercase tracking-wider">SDLC Pipeline</span>
+                        {project && ['brief_submitted', 'in_progress'].includes(project.status) && (
+                            <button onClick={cancelRun}
+                                className="ml-auto text-[10px] text-slate-500 hover:text-red-300 px-2 py-0.5 rounded bg-white/5 hover:bg-red-500/10 font-mono transition-colors">cancel run</button>
+                        )}
+                        {project?.status === 'cancelled' && <span className="ml-auto text-[10px] text-red-300/80 font-mono">cancelled</span>}
                     </div>
                     <div className="pipeline-container">
                         {SDLC_PHASES.map((phase, i) => {
@@ -276,15 +317,9 @@ function App() {
                                         {codeFiles.length > 0 && (
                                             <button
                                                 onClick={generatePrototype}
-                                                disabled={protoLoading}
                                                 className="w-full mt-2 bg-gradient-to-r from-pink-600 via-rose-500 to-orange-500 hover:from-pink-500 hover:via-rose-400 hover:to-orange-400 disabled:opacity-50 text-white px-6 py-3 rounded-xl font-bold transition-all flex items-center justify-center gap-2 text-sm shadow-lg shadow-pink-500/20"
                                             >
-                                                {protoLoading ? (
-                                                    <>
-                                                        <Loader2 className="w-4 h-4 animate-spin" />
-                                                        Generating Website...
-                                                    </>
-                                                ) : protoReady ? (
+                                                {protoReady ? (
                                                     <>
                                                         <Eye className="w-4 h-4" />
                                                         View Prototype
@@ -404,7 +439,7 @@ function App() {
                                         icon={<Code className="w-5 h-5 text-white" />}
                                         gradient="from-emerald-500 to-green-600"
                                         title="Generated Code"
-                                        subtitle={`${codeFiles.length} files generated`}
+                                        subtitle={`${generatedFiles.length} of ${codeFiles.length} files generated`}
                                         isOpen={activeSection === 'code'}
                                         onToggle={() => setActiveSection(activeSection === 'code' ? null : 'code')}
                                     >
@@ -418,10 +453,14 @@ function App() {
                                                 ))}
                                             </div>
                                         </div>
+                                        <a href={`${API}/projects/${project!.id}/export.zip`} download
+                                            className="inline-flex items-center gap-1.5 mb-3 px-3 py-1.5 rounded-lg text-[11px] font-semibold text-emerald-300 bg-emerald-500/10 border border-emerald-500/20 hover:bg-emerald-500/20 transition-colors">
+                                            <FolderTree className="w-3 h-3" /> Download project (.zip)
+                                        </a>
                                         <div className="flex gap-1 overflow-x-auto pb-1">
-                                            {codeFiles.map((f, i) => (
-                                                <button key={f} onClick={() => setCodeTab(i)}
-                                                    className={`px-3 py-1.5 rounded-lg text-[11px] font-mono whitespace-nowrap transition-all ${codeTab === i ? 'bg-emerald-500/15 text-emerald-300 border border-emerald-500/20' : 'text-slate-600 hover:text-slate-400'}`}>
+                                            {codeFiles.map(f => (
+                                                <button key={f} onClick={() => setCodeTab(f)}
+                                                    className={`px-3 py-1.5 rounded-lg text-[11px] font-mono whitespace-nowrap transition-all ${activeFile === f ? 'bg-emerald-500/15 text-emerald-300 border border-emerald-500/20' : 'text-slate-600 hover:text-slate-400'}`}>
                                                     {f.split('/').pop()}
                                                 </button>
                                             ))}
@@ -431,12 +470,12 @@ function App() {
                                                 <div className="code-dot bg-red-500/80" />
                                                 <div className="code-dot bg-yellow-500/80" />
                                                 <div className="code-dot bg-green-500/80" />
-                                                <span className="ml-3 text-xs font-mono text-slate-500">{codeFiles[codeTab]}</span>
-                                                <button onClick={() => navigator.clipboard.writeText(project!.artifacts!.code_snippets[codeFiles[codeTab]])}
+                                                <span className="ml-3 text-xs font-mono text-slate-500">{activeFile}</span>
+                                                <button onClick={() => navigator.clipboard.writeText(activeContent)}
                                                     className="ml-auto text-[10px] text-slate-500 hover:text-white px-2 py-0.5 rounded bg-white/5 hover:bg-white/10 font-mono transition-colors">copy</button>
                                             </div>
                                             <pre className="p-4 overflow-x-auto max-h-72 overflow-y-auto text-xs leading-relaxed">
-                                                <code className="text-emerald-300/80">{project!.artifacts!.code_snippets[codeFiles[codeTab]]}</code>
+                                                <code className="text-emerald-300/80">{activeContent}</code>
                                             </pre>
                                         </div>
                                     </ResultSection>
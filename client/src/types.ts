@@ -9,12 +9,21 @@ export interface Requirement {
     description: string;
     priority: "High" | "Medium" | "Low";
     acceptance_criteria: string[];
+    merged_from: string[];
+}
+
+export interface RequirementDedup {
+    removed: number;
+    tokens_saved_per_prompt: number;
+    estimated_tokens_saved: number;
 }
 
 export interface SRS {
     project_id: string;
     requirements: Requirement[];
     generated_at: string;
+    duplicates: Requirement[];
+    dedup?: RequirementDedup | null;
 }
 
 export interface WBSTask {
@@ -24,6 +33,19 @@ export interface WBSTask {
     estimated_days: number;
     dependencies: string[];
     assigned_role?: string;
+    optimistic_days?: number;
+    pessimistic_days?: number;
+    daily_rate?: number;
+}
+
+export interface RiskEstimate {
+    iterations: number;
+    duration_p50: number;
+    duration_p80: number;
+    duration_p95: number;
+    cost_p50: number;
+    cost_p80: number;
+    cost_p95: number;
 }
 
 export interface ProjectPlan {
@@ -31,6 +53,7 @@ export interface ProjectPlan {
     tasks: WBSTask[];
     total_estimated_days: number;
     estimated_cost: number;
+    risk?: RiskEstimate;
 }
 
 export interface AgentStatus {
@@ -40,9 +63,20 @@ export interface AgentStatus {
     last_updated: string;
 }
 
+export interface FileRef {
+    digest: string;
+    size: number;
+}
+
 export interface Artifacts {
     file_structure: string[];
-    code_snippets: Record<string, string>;
+    files: Record<string, FileRef>;
+}
+
+export interface WarmStart {
+    source_project_id: string;
+    similarity: number;
+    mode: "fewshot" | "reuse";
 }
 
 export interface ProjectState {
@@ -53,4 +87,11 @@ export interface ProjectState {
     artifacts?: Artifacts;
     status: string;
     agent_statuses: Record<string, AgentStatus>;
+    deadline_seconds?: number;
+    mode: 'full' | 'fast';
+    degraded_stages: Record<string, string>;
+    warm_start?: WarmStart;
+    completed_stages: string[];
+    resumed: number;
+    version: number;
 }